@@ -0,0 +1,164 @@
+"""
+Admission control for the API.
+
+Requests are split into route classes so that CPU-heavy endpoints (transfer
+ratings) can never take the slots that cheap lookups need. Each class has a
+fixed number of concurrent slots and a bounded wait queue, and every client
+gets a token bucket per class. Anything over the limits is turned away at
+once with 429 (client too fast) or 503 (server busy) plus Retry-After.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from flask import g, request
+
+from serialization import json_response
+
+# endpoints that run the full transfer analysis, or read or rate players in bulk
+HEAVY_ENDPOINTS = {"rate_transfer", "workspace_rate_transfer", "import_player_file", "export_player_ratings"}
+
+# long-lived streams that sit idle almost all the time, they would pin a slot for hours
+EXEMPT_ENDPOINTS = {"squad_event_stream"}
+
+# per route class: concurrent slots, max waiting requests, seconds a request may wait
+DEFAULT_GATES = {
+    "heavy": {"max_concurrent": 4, "max_queue": 16, "queue_timeout": 2.0},
+    "cheap": {"max_concurrent": 32, "max_queue": 128, "queue_timeout": 0.5},
+}
+
+# per client and route class: sustained requests per second, burst size
+DEFAULT_RATE_LIMITS = {
+    "heavy": (5.0, 20),
+    "cheap": (50.0, 100),
+}
+
+# how many client buckets to remember before evicting the least recently seen
+MAX_TRACKED_CLIENTS = 10000
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate` tokens per second"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: int, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take one token, returning 0 on success or the seconds until one is available"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+class RateLimiter:
+    """Token buckets per (client, route class), bounded with LRU eviction"""
+
+    def __init__(self, limits: Dict[str, Tuple[float, int]], max_clients: int = MAX_TRACKED_CLIENTS):
+        self.limits = limits
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, client: str, route_class: str) -> float:
+        """Seconds the client has to wait, 0 when the request may proceed"""
+        rate, burst = self.limits[route_class]
+        key = (client, route_class)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(rate, burst, now)
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket.take(now)
+
+class AdmissionGate:
+    """Fixed concurrency with a bounded, time-limited wait queue"""
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._waiting = 0
+
+    def enter(self) -> bool:
+        """Take a slot, waiting briefly if the queue has room; False means rejected"""
+        if self._slots.acquire(blocking=False):
+            return True
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                return False
+            self._waiting += 1
+        try:
+            return self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def leave(self):
+        self._slots.release()
+
+class AdmissionController:
+    """Flask extension applying rate limits and admission gates to /api routes"""
+
+    def __init__(self, app=None, gates: Optional[Dict] = None, rate_limits: Optional[Dict] = None):
+        gates = gates or DEFAULT_GATES
+        self.gates = {name: AdmissionGate(**config) for name, config in gates.items()}
+        self.rate_limiter = RateLimiter(rate_limits or DEFAULT_RATE_LIMITS)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._admit)
+        app.teardown_request(self._release)
+
+    def route_class(self) -> Optional[str]:
+        """Route class of the current request, None for requests that bypass admission"""
+        if request.endpoint is None or request.endpoint in EXEMPT_ENDPOINTS or not request.path.startswith("/api/"):
+            return None
+        return "heavy" if request.endpoint in HEAVY_ENDPOINTS else "cheap"
+
+    def _admit(self):
+        route_class = self.route_class()
+        if route_class is None:
+            return None
+
+        wait = self.rate_limiter.check(request.remote_addr or "unknown", route_class)
+        if wait > 0:
+            return self._reject(429, "Too many requests, slow down", wait)
+
+        gate = self.gates[route_class]
+        if not gate.enter():
+            return self._reject(503, "Server busy, try again shortly", gate.queue_timeout)
+        g.admission_gate = gate
+        return None
+
+    def _release(self, exc=None):
+        gate = g.pop("admission_gate", None)
+        if gate is not None:
+            gate.leave()
+
+    def _reject(self, status: int, message: str, retry_after: float):
+        response = json_response({"error": message}, status)
+        response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+        return response
+
+def hold_slot(response):
+    """Keep the request's admission slot until a streamed response has been sent"""
+    # teardown runs before a streamed body is generated, so the slot moves to the response
+    gate = g.pop("admission_gate", None)
+    if gate is not None:
+        response.call_on_close(gate.leave)
+    return response
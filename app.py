@@ -1,32 +1,115 @@
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, request
 from flask_cors import CORS
+import hmac
+import io
 import json
 import os
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional, Collection, Callable
 import math
 import random
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from players_database import CURRENT_SQUAD, LA_LIGA_PLAYERS, get_players_by_team
-import unicodedata
+from players_database import get_players_by_team, current_snapshot, watch_data_file, add_reload_listener
+from players_database import normalize_string, search_players as find_players, suggest_players, use_store
+from players_database import SORTED_FIELDS, get_leaderboard, get_players_in_range
+from serialization import json_response, cached_json_response
+from admission import AdmissionController, hold_slot
+from tracing import Tracer, span
+import static_assets
+from similarity import SimilarityIndex, find_similar_players
+from league_stats import LeaguePercentiles, snapshot_percentiles
+from scoring_profiles import DEFAULT, DEFAULT_PROFILE, ScoringProfile, load_profiles
+from rankings import RankingService
+from squad_events import MAX_SUBSCRIBERS, SquadEventBroker
+from workspaces import SquadWorkspace, WorkspaceManager
+import bulk_players
 
-app = Flask(__name__, static_folder='.')
-CORS(app)
+app = Flask(__name__, static_folder=None)
+# every route but the player import may be called from other origins
+CORS(app, resources={r"^(?!/api/players/import$).*": {}})
 
-def normalize_string(text: str) -> str:
-    """
-    Normalize string by removing accents and converting to lowercase
-    """
-    if not text:
-        return ""
-    
-    # Normalize unicode characters and remove accents
-    normalized = unicodedata.normalize('NFD', text)
-    # Filter out combining characters (accents)
-    ascii_text = ''.join(c for c in normalized if unicodedata.category(c) != 'Mn')
-    return ascii_text.lower()
+# per-request timing spans appended as JSON lines, registered first so rejected requests are traced too
+if os.environ.get('BARCARATE_TRACE_FILE'):
+    tracer = Tracer(os.environ['BARCARATE_TRACE_FILE'], app)
+
+# rate limiting and bounded queues per route class, BARCARATE_ADMISSION=0 turns it off
+if os.environ.get('BARCARATE_ADMISSION', '1') != '0':
+    admission = AdmissionController(app)
+
+# serve search, team lookups and leaderboards from a SQLite database built with player_store.py;
+# what needs every player in memory (similar players, percentiles, league context) is off then
+player_db = None
+if os.environ.get('BARCARATE_DB') and os.environ.get('BARCARATE_SEARCH_WORKERS'):
+    raise ValueError("BARCARATE_DB and BARCARATE_SEARCH_WORKERS both replace the search backend, set only one")
+if os.environ.get('BARCARATE_DB'):
+    from player_store import SQLitePlayerStore
+    player_db = SQLitePlayerStore(os.environ['BARCARATE_DB'])
+    use_store(player_db)
+
+# rating/value history recorded with player_history.py, for the trend endpoints
+history = None
+if os.environ.get('BARCARATE_HISTORY'):
+    from player_history import HistoryStore
+    history = HistoryStore(os.environ['BARCARATE_HISTORY'])
+
+# hot reload player data from a JSON file instead of the built-in lists
+if os.environ.get('BARCARATE_DATA_FILE'):
+    data_watcher = watch_data_file(os.environ['BARCARATE_DATA_FILE'])
+
+# search, typeahead and team lookups fanned out over league shards in worker processes
+if os.environ.get('BARCARATE_SEARCH_WORKERS'):
+    from sharded_search import ShardedPlayerStore
+    sharded_store = ShardedPlayerStore(int(os.environ['BARCARATE_SEARCH_WORKERS']),
+                                       os.environ.get('BARCARATE_SHARD_BY', 'league'))
+    add_reload_listener(sharded_store.on_reload)
+    # the first load is synchronous, later reloads happen on the store's loader thread
+    initial = current_snapshot()
+    sharded_store.load(initial.players, initial.version, initial.players_digest)
+    use_store(sharded_store)
+
+# what ?fields= can ask for: analysis keys, plus the other keys of a rating response
+ANALYSIS_FIELDS = ("rating", "recommendation", "recommendation_desc", "explanation",
+                   "risk_factors", "breakdown", "league_context", "error")
+RATING_RESPONSE_FIELDS = ("player", "squad_weaknesses", "timestamp")
+# and on player lists, the keys a player can have
+PLAYER_FIELDS = bulk_players.PLAYER_COLUMNS
+
+# named scoring profiles, selectable per request with ?profile=
+PROFILES_PATH = os.environ.get('BARCARATE_PROFILES', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scoring_profiles.json'))
+profiles = load_profiles(PROFILES_PATH) if os.path.exists(PROFILES_PATH) else {DEFAULT_PROFILE: DEFAULT}
+
+# squad weaknesses that make a signing at each position urgent
+POSITION_URGENT_WEAKNESSES = {
+    "GK": ("goalkeeper_quality", "goalkeeper_depth"),
+    "CB": ("cb_depth", "cb_future", "defensive_quality"),
+    "LB": ("fullback_depth",),
+    "RB": ("fullback_depth",),
+    "DM": ("dm_depth", "dm_quality"),
+    "CM": ("midfield_quality",),
+    "ST": ("striker_depth", "striker_aging"),
+}
+
+# recent analyses kept per analyzer, i.e. per data snapshot and profile; keyed by
+# the player fields the analysis reads (name, age, rating, value, position, team)
+ANALYSIS_CACHE_SIZE = 1024
 
 class TransferAnalyzer:
-    def __init__(self):
+    def __init__(self, squad: Dict[str, List[Dict]] = None, league: LeaguePercentiles = None,
+                 profile: ScoringProfile = DEFAULT, cache_size: int = 0):
+        # squad and league percentiles to analyze against, None follows the live data snapshot
+        self._squad = squad
+        self._league = league
+        self.profile = profile
+        # squad lookups, kept only when the squad is fixed
+        self._names = None
+        self._position_counts = None
+        
+        # recent generate_detailed_analysis results, only for analyzers bound to a squad
+        self._results = OrderedDict()
+        self._results_lock = threading.Lock()
+        self.cache_size = cache_size if squad is not None else 0
+        
         # Updated analysis factors with more stringent weightings
         self.analysis_factors = {
             'age': {'weight': 0.25, 'optimal_range': (19, 26), 'peak_range': (21, 24)},
@@ -40,26 +123,48 @@ class TransferAnalyzer:
         self.max_rating = 9.5
         
         # Financial risk thresholds
-        self.financial_risk_thresholds = {
-            'high_risk': 80000000,    # 80M+ is high financial risk
-            'medium_risk': 40000000,  # 40-80M is medium risk
-            'low_risk': 20000000      # Under 20M is low risk
-        }
+        self.financial_risk_thresholds = profile.financial_risk_thresholds
+    
+    @property
+    def squad(self) -> Dict[str, List[Dict]]:
+        return self._squad if self._squad is not None else current_snapshot().squad
+    
+    @property
+    def league(self) -> LeaguePercentiles:
+        return self._league if self._league is not None else snapshot_percentiles(current_snapshot())
+    
+    def squad_names(self) -> frozenset:
+        """Lowercased names of everyone in the squad"""
+        if self._squad is not None and self._names is not None:
+            return self._names
+        names = frozenset(p["name"].lower() for group in self.squad.values() for p in group)
+        if self._squad is not None:
+            self._names = names
+        return names
+    
+    def position_counts(self) -> Dict[str, int]:
+        """Squad players per position"""
+        if self._squad is not None and self._position_counts is not None:
+            return self._position_counts
+        counts = {}
+        for group in self.squad.values():
+            for p in group:
+                counts[p["position"]] = counts.get(p["position"], 0) + 1
+        if self._squad is not None:
+            self._position_counts = counts
+        return counts
     
     def check_existing_player(self, player_name: str) -> bool:
         """Check if player is already in Barcelona squad"""
-        all_barca_players = []
-        for position_group in CURRENT_SQUAD.values():
-            all_barca_players.extend([p["name"].lower() for p in position_group])
-        
-        return player_name.lower() in all_barca_players
+        return player_name.lower() in self.squad_names()
     
     def analyze_squad_weaknesses(self) -> List[str]:
         """Enhanced squad analysis with more detailed position tracking"""
         weaknesses = []
+        squad = self.squad
         
         # Goalkeeper analysis - stricter requirements
-        goalkeepers = CURRENT_SQUAD["goalkeepers"]
+        goalkeepers = squad["goalkeepers"]
         young_gks = [gk for gk in goalkeepers if gk["age"] < 30 and gk["rating"] >= 80]
         if len(young_gks) < 1:
             weaknesses.append("goalkeeper_quality")
@@ -70,7 +175,7 @@ class TransferAnalyzer:
         
         # Age distribution analysis - more stringent
         all_players = []
-        for position_group in CURRENT_SQUAD.values():
+        for position_group in squad.values():
             all_players.extend(position_group)
         
         aging_players = [p for p in all_players if p["age"] > 30]
@@ -82,15 +187,15 @@ class TransferAnalyzer:
             weaknesses.append("critical_aging")
         
         # Position-specific depth analysis with higher standards
-        forwards = CURRENT_SQUAD["forwards"]
+        forwards = squad["forwards"]
         strikers = [p for p in forwards if p["position"] == "ST" and p["age"] < 35]
         wingers = [p for p in forwards if p["position"] in ["LW", "RW"] and p["age"] < 30]
         
-        defenders = CURRENT_SQUAD["defenders"]
+        defenders = squad["defenders"]
         center_backs = [p for p in defenders if p["position"] == "CB"]
         fullbacks = [p for p in defenders if p["position"] in ["LB", "RB"] and p["age"] < 29]
         
-        midfielders = CURRENT_SQUAD["midfielders"]
+        midfielders = squad["midfielders"]
         defensive_mids = [p for p in midfielders if p["position"] == "DM"]
         creative_mids = [p for p in midfielders if p["position"] == "AM" and p["age"] < 28]
         
@@ -121,7 +226,7 @@ class TransferAnalyzer:
         
         # Quality thresholds by position group
         avg_ratings = {}
-        for pos_name, players in CURRENT_SQUAD.items():
+        for pos_name, players in squad.items():
             if players:
                 avg_ratings[pos_name] = sum(p["rating"] for p in players) / len(players)
         
@@ -134,16 +239,7 @@ class TransferAnalyzer:
     
     def calculate_position_redundancy(self, player_position: str, player_age: int) -> Tuple[float, str]:
         """More balanced position redundancy calculation"""
-        position_players = []
-        for pos_group in CURRENT_SQUAD.values():
-            position_players.extend([p for p in pos_group if p["position"] == player_position])
-        
-        # Count by age groups
-        young_players = [p for p in position_players if p["age"] < 25]
-        prime_players = [p for p in position_players if 25 <= p["age"] < 30]
-        veteran_players = [p for p in position_players if p["age"] >= 30]
-        
-        total_at_position = len(position_players)
+        total_at_position = self.position_counts().get(player_position, 0)
         redundancy_penalty = 0.0
         redundancy_desc = ""
         
@@ -201,28 +297,13 @@ class TransferAnalyzer:
     
     def calculate_position_need_score(self, player_position: str, player_age: int, weaknesses: List[str]) -> Tuple[float, str]:
         """Enhanced position need calculation"""
-        # Base need scores
-        position_needs = {
-            "GK": {"base_score": 0.5, "urgent_weaknesses": ["goalkeeper_quality", "goalkeeper_depth"]},
-            "CB": {"base_score": 1.0, "urgent_weaknesses": ["cb_depth", "cb_future", "defensive_quality"]},
-            "LB": {"base_score": 0.8, "urgent_weaknesses": ["fullback_depth"]},
-            "RB": {"base_score": 0.8, "urgent_weaknesses": ["fullback_depth"]},
-            "DM": {"base_score": 1.5, "urgent_weaknesses": ["dm_depth", "dm_quality"]},
-            "CM": {"base_score": 0.3, "urgent_weaknesses": ["midfield_quality"]},
-            "AM": {"base_score": 0.0, "urgent_weaknesses": []},  # We have plenty
-            "LW": {"base_score": -0.5, "urgent_weaknesses": []},  # Overcrowded
-            "RW": {"base_score": -0.5, "urgent_weaknesses": []},  # Overcrowded
-            "ST": {"base_score": 1.2, "urgent_weaknesses": ["striker_depth", "striker_aging"]}
-        }
-        
-        need_info = position_needs.get(player_position, {"base_score": 0.0, "urgent_weaknesses": []})
-        need_score = need_info["base_score"]
+        need_score = self.profile.position_base_scores.get(player_position, 0.0)
         
         # Check for urgent weaknesses
         urgent_need_bonus = 0.0
-        for weakness in need_info["urgent_weaknesses"]:
+        for weakness in POSITION_URGENT_WEAKNESSES.get(player_position, ()):
             if weakness in weaknesses:
-                urgent_need_bonus += 0.8
+                urgent_need_bonus += self.profile.urgent_bonus
         
         # Age-based adjustments for need
         age_adjustment = 0.0
@@ -255,6 +336,15 @@ class TransferAnalyzer:
         
         return final_score, desc
     
+    def assess_quality(self, player: Dict) -> Tuple[float, str]:
+        """Base quality score from the player's rating"""
+        rating = player["rating"]
+        for min_rating, score, note in self.profile.quality_tiers:
+            if rating >= min_rating:
+                return score, note
+        # ratings below every tier get the last one
+        return self.profile.quality_tiers[-1][1:]
+    
     def analyze_player_age_impact(self, player: Dict) -> Tuple[float, str]:
         """Balanced age analysis - rewarding exceptional talents appropriately"""
         age = player["age"]
@@ -453,8 +543,41 @@ class TransferAnalyzer:
         
         return special_score, special_factors
     
-    def generate_detailed_analysis(self, player: Dict, weaknesses: List[str]) -> Dict[str, Any]:
-        """Enhanced analysis with stricter rating system"""
+    def assess_risk_factors(self, player: Dict) -> List[str]:
+        """Age, financial, negotiation, squad and adaptation risks of a transfer"""
+        risk_factors = []
+        
+        # Age-related risks
+        if player["age"] > 32:
+            risk_factors.append("significant age-related decline risk")
+        elif player["age"] > 29:
+            risk_factors.append("approaching decline phase")
+        
+        # Financial risks
+        if player["value"] > 80000000:
+            risk_factors.append("massive financial commitment with pressure")
+        elif player["value"] > 50000000:
+            risk_factors.append("substantial financial investment required")
+        
+        # Performance risks
+        if player.get("team") == "Real Madrid":
+            risk_factors.append("complex and potentially hostile negotiation")
+        
+        # Position-specific risks
+        redundancy_penalty, _ = self.calculate_position_redundancy(player["position"], player["age"])
+        if redundancy_penalty < -0.5:
+            risk_factors.append("position may become overcrowded")
+        
+        # Adaptation risks for non-La Liga players
+        if player.get("team") and not any(la_liga_team in player["team"] for la_liga_team in ["Real Madrid", "Barcelona", "Atletico", "Sevilla", "Valencia", "Villarreal", "Real Sociedad", "Athletic Bilbao", "Real Betis", "Celta", "Getafe", "Osasuna", "Las Palmas", "Rayo", "Mallorca", "Girona", "Alaves", "Espanyol", "Leganes", "Valladolid"]):
+            risk_factors.append("adaptation to La Liga style and pace required")
+        
+        return risk_factors
+    
+    def generate_detailed_analysis(self, player: Dict, weaknesses: List[str],
+                                   fields: Optional[Collection[str]] = None) -> Dict[str, Any]:
+        """Enhanced analysis with stricter rating system, limited to `fields` (see ANALYSIS_FIELDS) if given"""
+        wanted = ANALYSIS_FIELDS if fields is None else fields
         
         # Check if player is already at Barcelona
         if self.check_existing_player(player["name"]):
@@ -467,31 +590,7 @@ class TransferAnalyzer:
             }
         
         # Base quality assessment with balanced standards
-        quality_score = 0.0
-        quality_notes = []
-        
-        rating = player["rating"]
-        if rating >= 90:
-            quality_score = 4.2  # Increased for superstars
-            quality_notes.append("world-class elite talent")
-        elif rating >= 87:
-            quality_score = 3.5  # Increased for top-tier players
-            quality_notes.append("exceptional top-tier performer")
-        elif rating >= 84:
-            quality_score = 2.8  # Increased
-            quality_notes.append("high-quality proven player")
-        elif rating >= 81:
-            quality_score = 2.0  # Increased
-            quality_notes.append("solid professional above average")
-        elif rating >= 78:
-            quality_score = 1.2  # Increased
-            quality_notes.append("decent squad player")
-        elif rating >= 75:
-            quality_score = 0.4  # Less harsh
-            quality_notes.append("borderline Barcelona quality")
-        else:
-            quality_score = -1.0  # Less harsh
-            quality_notes.append("below Barcelona's required standards")
+        quality_score, quality_note = self.assess_quality(player)
         
         # Age impact analysis
         age_score, age_desc = self.analyze_player_age_impact(player)
@@ -526,44 +625,6 @@ class TransferAnalyzer:
         
         final_rating = round(final_rating, 1)
         
-        # Generate comprehensive explanation
-        explanation_parts = []
-        explanation_parts.append(f"Quality assessment: {quality_notes[0]}")
-        explanation_parts.append(f"Age factor: {age_desc}")
-        explanation_parts.append(f"Financial aspect: {financial_desc}")
-        explanation_parts.append(f"Positional need: {position_desc}")
-        
-        if special_factors:
-            explanation_parts.extend(special_factors)
-        
-        # Enhanced risk assessment
-        risk_factors = []
-        
-        # Age-related risks
-        if player["age"] > 32:
-            risk_factors.append("significant age-related decline risk")
-        elif player["age"] > 29:
-            risk_factors.append("approaching decline phase")
-        
-        # Financial risks
-        if player["value"] > 80000000:
-            risk_factors.append("massive financial commitment with pressure")
-        elif player["value"] > 50000000:
-            risk_factors.append("substantial financial investment required")
-        
-        # Performance risks
-        if player.get("team") == "Real Madrid":
-            risk_factors.append("complex and potentially hostile negotiation")
-        
-        # Position-specific risks
-        redundancy_penalty, _ = self.calculate_position_redundancy(player["position"], player["age"])
-        if redundancy_penalty < -0.5:
-            risk_factors.append("position may become overcrowded")
-        
-        # Adaptation risks for non-La Liga players
-        if player.get("team") and not any(la_liga_team in player["team"] for la_liga_team in ["Real Madrid", "Barcelona", "Atletico", "Sevilla", "Valencia", "Villarreal", "Real Sociedad", "Athletic Bilbao", "Real Betis", "Celta", "Getafe", "Osasuna", "Las Palmas", "Rayo", "Mallorca", "Girona", "Alaves", "Espanyol", "Leganes", "Valladolid"]):
-            risk_factors.append("adaptation to La Liga style and pace required")
-        
         # Final recommendation with balanced thresholds
         if final_rating >= 9.0:
             recommendation = "Dream Signing"
@@ -587,104 +648,353 @@ class TransferAnalyzer:
             recommendation = "Not Recommended"
             recommendation_desc = "Does not meet Barcelona's standards or needs"
         
-        return {
+        analysis = {
             "rating": final_rating,
             "recommendation": recommendation,
             "recommendation_desc": recommendation_desc,
-            "explanation": ". ".join(explanation_parts),
-            "risk_factors": risk_factors,
-            "breakdown": {
-                "quality": round(quality_score, 1),
-                "age_impact": round(age_score, 1),
-                "financial_risk": round(financial_score, 1),
-                "position_need": round(position_score, 1),
-                "special_factors": round(special_score, 1),
-                "raw_total": round(raw_total, 1)
-            },
-            "error": False
         }
+        
+        # Text and risk factors are only built for callers that ask for them
+        if "explanation" in wanted:
+            explanation_parts = [
+                f"Quality assessment: {quality_note}",
+                f"Age factor: {age_desc}",
+                f"Financial aspect: {financial_desc}",
+                f"Positional need: {position_desc}",
+            ]
+            explanation_parts.extend(special_factors)
+            analysis["explanation"] = ". ".join(explanation_parts)
+        if "risk_factors" in wanted:
+            analysis["risk_factors"] = self.assess_risk_factors(player)
+        analysis["breakdown"] = {
+            "quality": round(quality_score, 1),
+            "age_impact": round(age_score, 1),
+            "financial_risk": round(financial_score, 1),
+            "position_need": round(position_score, 1),
+            "special_factors": round(special_score, 1),
+            "raw_total": round(raw_total, 1)
+        }
+        # the league is the in-memory players, which a database store does not serve
+        if "league_context" in wanted and player_db is None:
+            analysis["league_context"] = self.league.player_context(player)
+        analysis["error"] = False
+        
+        if fields is not None:
+            return {key: value for key, value in analysis.items() if key in fields}
+        return analysis
+
+    def analyze(self, player: Dict, weaknesses: List[str], fields: Optional[Collection[str]] = None) -> Dict[str, Any]:
+        """generate_detailed_analysis, answered from recent results when the same player is rated again"""
+        if not self.cache_size:
+            return self.generate_detailed_analysis(player, weaknesses, fields)
+        get = player.get
+        key = (get("name"), get("age"), get("rating"), get("value"), get("position"), get("team"),
+               tuple(weaknesses), None if fields is None else tuple(fields))
+        try:
+            with self._results_lock:
+                seen = key in self._results
+                if seen:
+                    self._results.move_to_end(key)
+                    cached = self._results[key]
+                else:
+                    # a first sighting is only remembered, results are kept from the second one on
+                    cached = self._results[key] = None
+                    if len(self._results) > self.cache_size:
+                        self._results.popitem(last=False)
+        except TypeError:
+            # unhashable values in the player payload, not worth caching
+            return self.generate_detailed_analysis(player, weaknesses, fields)
+        if cached is not None:
+            return copy_analysis(cached)
+        
+        analysis = self.generate_detailed_analysis(player, weaknesses, fields)
+        if not seen:
+            return analysis
+        with self._results_lock:
+            if key in self._results:
+                self._results[key] = analysis
+        # the cached one stays private, callers may change theirs
+        return copy_analysis(analysis)
+
+def copy_analysis(value):
+    """Copy of an analysis with fresh dicts and lists all the way down"""
+    if isinstance(value, dict):
+        return {key: copy_analysis(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_analysis(item) for item in value]
+    return value
 
 # Initialize analyzer
 analyzer = TransferAnalyzer()
 
+def snapshot_analyzer(snapshot, profile: ScoringProfile = DEFAULT) -> TransferAnalyzer:
+    """Analyzer bound to one data snapshot and scoring profile, created once and kept with the snapshot"""
+    return snapshot.derived(('analyzer', profile.name), lambda s: TransferAnalyzer(
+        s.squad, snapshot_percentiles(s), profile, ANALYSIS_CACHE_SIZE))
+
+def snapshot_weaknesses(snapshot) -> List[str]:
+    """Squad weaknesses for a snapshot, computed once per snapshot"""
+    return snapshot.derived('weaknesses', lambda s: snapshot_analyzer(s).analyze_squad_weaknesses())
+
+def requested_fields(allowed=None) -> Optional[List[str]]:
+    """Fields named in ?fields=a,b,c, None when absent; ValueError for names not in allowed"""
+    raw = request.args.get('fields')
+    if raw is None:
+        return None
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    if allowed is not None:
+        unknown = [field for field in fields if field not in allowed]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)} (choose from {', '.join(allowed)})")
+    return fields
+
+# the analysis fields rankings keep
+RANKING_FIELDS = ("rating", "recommendation", "breakdown")
+
+def rate_candidates(snapshot):
+    """(player id, rating, raw total, recommendation) for every player not already in the squad"""
+    candidate_analyzer = snapshot_analyzer(snapshot)
+    weaknesses = snapshot_weaknesses(snapshot)
+    for player_id, player in enumerate(snapshot.players):
+        if candidate_analyzer.check_existing_player(player["name"]):
+            continue
+        analysis = candidate_analyzer.generate_detailed_analysis(player, weaknesses, RANKING_FIELDS)
+        yield player_id, analysis["rating"], analysis["breakdown"]["raw_total"], analysis["recommendation"]
+
+# candidate rankings, materialized in the background once per players/squad version
+rankings = RankingService(rate_candidates)
+add_reload_listener(rankings.on_reload)
+
 @app.route('/api/squad')
 def get_squad():
     """Get current Barcelona squad"""
-    return jsonify(CURRENT_SQUAD)
+    snapshot = current_snapshot()
+    return cached_json_response('squad', snapshot.version, lambda: snapshot.squad)
 
 @app.route('/api/players/search')
 def search_players():
     """Search La Liga players for transfers with advanced filtering and accent-insensitive search"""
-    query = request.args.get('q', '').lower()
-    position = request.args.get('position', '').upper()
-    team = request.args.get('team', '')
-    min_rating = int(request.args.get('min_rating', 0))
-    max_age = int(request.args.get('max_age', 50))
-    max_value = int(request.args.get('max_value', 999999999))
+    try:
+        fields = requested_fields(PLAYER_FIELDS)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+    with span("filter"):
+        players = find_players(
+            query=request.args.get('q', ''),
+            position=request.args.get('position', ''),
+            team=request.args.get('team', ''),
+            min_rating=int(request.args.get('min_rating', 0)),
+            max_age=int(request.args.get('max_age', 50)),
+            max_value=int(request.args.get('max_value', 999999999)),
+            # Limit results to prevent overwhelming the UI
+            limit=30
+        )
+    if fields is not None:
+        players = [{field: player[field] for field in fields if field in player} for player in players]
+    return json_response(players)
+
+@app.route('/api/players/suggest')
+def players_suggest():
+    """Typeahead suggestions, just ids and names for the search box"""
+    limit = request.args.get('limit', 8, type=int)
+    return json_response(suggest_players(request.args.get('q', ''), max(1, min(limit, 10))))
+
+@app.route('/api/players/similar')
+def players_similar():
+    """Players most like a given one, e.g. younger and cheaper replacements"""
+    if player_db is not None:
+        return json_response({"error": "Similar players are not available with BARCARATE_DB"}, 404)
+    snapshot = current_snapshot()
+    indexes = snapshot.indexes
     
-    filtered_players = LA_LIGA_PLAYERS.copy()
+    name = request.args.get('name', '')
+    player_id = indexes.name_index.get(normalize_string(name.strip()))
+    if player_id is None:
+        return json_response({"error": f"Unknown player: {name}" if name else "Player name required"}, 400)
+    reference = snapshot.players[player_id]
     
-    # Apply filters with accent-insensitive search for names
-    if query:
-        normalized_query = normalize_string(query)
-        filtered_players = [
-            p for p in filtered_players 
-            if normalized_query in normalize_string(p["name"])
-        ]
+    index = snapshot.derived('similarity', lambda s: SimilarityIndex(s.players))
+    matches = find_similar_players(
+        index,
+        reference,
+        limit=max(1, min(request.args.get('limit', 10, type=int), 50)),
+        younger=request.args.get('younger', '').lower() in ('1', 'true', 'yes'),
+        cheaper=request.args.get('cheaper', '').lower() in ('1', 'true', 'yes'),
+        max_age=request.args.get('max_age', type=int),
+        max_value=request.args.get('max_value', type=int),
+        min_rating=request.args.get('min_rating', type=int),
+        position=request.args.get('position', '').upper(),
+        exclude_team=request.args.get('exclude_team', '')
+    )
     
-    if position:
-        filtered_players = [p for p in filtered_players if p["position"] == position]
+    return json_response({
+        "reference": reference,
+        "similar": [dict(player, distance=round(distance, 3)) for distance, player in matches]
+    })
+
+@app.route('/api/players/by-team/<team_name>')
+def get_players_by_team_route(team_name):
+    """Get all players from a specific team"""
+    players = get_players_by_team(team_name)
+    return json_response(players)
+
+@app.route('/api/players/leaderboard')
+def players_leaderboard():
+    """Top players by value, age or rating"""
+    field = request.args.get('by', 'rating')
+    order = request.args.get('order', 'desc')
+    limit = request.args.get('limit', 10, type=int)
     
-    if team:
-        filtered_players = [p for p in filtered_players if team.lower() in p["team"].lower()]
+    if field not in SORTED_FIELDS:
+        return json_response({"error": f"Leaderboard field must be one of: {', '.join(SORTED_FIELDS)}"}, 400)
+    if order not in ("asc", "desc"):
+        return json_response({"error": "Order must be 'asc' or 'desc'"}, 400)
     
-    if min_rating > 0:
-        filtered_players = [p for p in filtered_players if p["rating"] >= min_rating]
+    limit = max(0, min(limit, 100))
+    if player_db is not None:
+        return json_response(player_db.leaderboard(field, limit, descending=(order == "desc")))
+    return json_response(get_leaderboard(field, limit, descending=(order == "desc")))
+
+@app.route('/api/players/range')
+def players_in_range():
+    """Players whose value, age or rating falls within an inclusive range"""
+    field = request.args.get('field', 'value')
+    low = request.args.get('min', type=int)
+    high = request.args.get('max', type=int)
+    limit = request.args.get('limit', 50, type=int)
     
-    if max_age < 50:
-        filtered_players = [p for p in filtered_players if p["age"] <= max_age]
+    if field not in SORTED_FIELDS:
+        return json_response({"error": f"Range field must be one of: {', '.join(SORTED_FIELDS)}"}, 400)
     
-    if max_value < 999999999:
-        filtered_players = [p for p in filtered_players if p["value"] <= max_value]
+    limit = max(0, min(limit, 100))
+    if player_db is not None:
+        return json_response(player_db.players_in_range(field, low, high, limit))
+    return json_response(get_players_in_range(field, low, high, limit))
+
+# imports change the live data, so they are off unless a token is configured; replacing
+# the whole player list needs BARCARATE_IMPORT_REPLACE=1 on top
+IMPORT_TOKEN = os.environ.get('BARCARATE_IMPORT_TOKEN', '')
+IMPORT_REPLACE = os.environ.get('BARCARATE_IMPORT_REPLACE', '0') == '1'
+
+@app.route('/api/players/import', methods=['POST'])
+def import_player_file():
+    """Add or update players from a CSV/NDJSON body, read and validated in chunks"""
+    if not IMPORT_TOKEN:
+        return json_response({"error": "Imports are not enabled (set BARCARATE_IMPORT_TOKEN)"}, 404)
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {IMPORT_TOKEN}"):
+        return json_response({"error": "Send the import token as Authorization: Bearer <token>"}, 401)
+    if os.environ.get('BARCARATE_DB') or os.environ.get('BARCARATE_DATA_FILE'):
+        # the store or the data file would keep serving their own players
+        return json_response({"error": "Imports only go into the built-in data, import into the BARCARATE_DB or BARCARATE_DATA_FILE file instead"}, 409)
+    fmt = request.args.get('format') or bulk_players.format_for(request.mimetype)
+    if fmt not in bulk_players.FORMATS:
+        return json_response({"error": f"Send text/csv or application/x-ndjson, or pass format= ({', '.join(bulk_players.FORMATS)})"}, 400)
+    mode = request.args.get('mode', 'merge')
+    if mode not in ('merge', 'replace'):
+        return json_response({"error": "mode must be merge or replace"}, 400)
+    if mode == 'replace' and not IMPORT_REPLACE:
+        return json_response({"error": "mode=replace is not enabled (set BARCARATE_IMPORT_REPLACE=1)"}, 403)
     
-    # Sort by rating descending
-    filtered_players.sort(key=lambda x: x["rating"], reverse=True)
+    text = io.TextIOWrapper(io.BufferedReader(request.stream), encoding='utf-8', newline='')
+    try:
+        report, published = bulk_players.import_players(
+            text, fmt, replace=mode == 'replace', strict=request.args.get('strict', '0') == '1')
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
     
-    # Limit results to prevent overwhelming the UI
-    return jsonify(filtered_players[:30])
+    response = report.summary()
+    response["data_version"] = current_snapshot().version
+    if not published:
+        response["error"] = "rejected rows in a strict import, nothing was loaded" if report.rejected else "no valid players in the file"
+        return json_response(response, 400)
+    return json_response(response)
 
-@app.route('/api/players/by-team/<team_name>')
-def get_players_by_team_route(team_name):
-    """Get all players from a specific team"""
-    players = get_players_by_team(team_name)
-    return jsonify(players)
+@app.route('/api/players/export')
+def export_player_ratings():
+    """Every transfer candidate with their rating, streamed as NDJSON or CSV"""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in bulk_players.FORMATS:
+        return json_response({"error": f"format must be one of: {', '.join(bulk_players.FORMATS)}"}, 400)
+    try:
+        fields = requested_fields(ANALYSIS_FIELDS) if fmt == 'ndjson' else RANKING_FIELDS
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+    profile = profiles.get(request.args.get('profile', DEFAULT_PROFILE))
+    if profile is None:
+        return json_response({"error": f"Unknown profile, choose from: {', '.join(profiles)}"}, 400)
+    
+    # the whole export comes from the snapshot current when it started
+    snapshot = current_snapshot()
+    export_analyzer = snapshot_analyzer(snapshot, profile)
+    weaknesses = snapshot_weaknesses(snapshot)
+    # squad members are not transfer targets, same as rankings
+    candidates = (player for player in snapshot.players if not export_analyzer.check_existing_player(player["name"]))
+    body = bulk_players.export_players(
+        candidates, lambda player: export_analyzer.generate_detailed_analysis(player, weaknesses, fields), fmt)
+    response = Response(body, mimetype=bulk_players.CONTENT_TYPES[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=players-v{snapshot.version}.{fmt}'
+    # rating the whole league is heavy work, keep the admission slot while the body streams
+    return hold_slot(response)
 
-@app.route('/api/transfer/rate', methods=['POST'])
-def rate_transfer():
-    """Rate a potential transfer with detailed analysis"""
+def rate_response(analyzer_for: Callable[[ScoringProfile], 'TransferAnalyzer'], weaknesses_for: Callable[[], List[str]]):
+    """Rate the posted player against a squad, honouring ?fields= and ?profile="""
     player_data = request.get_json()
     
     if not player_data:
-        return jsonify({"error": "Player data required"}), 400
+        return json_response({"error": "Player data required"}, 400)
+    try:
+        fields = requested_fields(ANALYSIS_FIELDS + RATING_RESPONSE_FIELDS)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+    profile = profiles.get(request.args.get('profile', DEFAULT_PROFILE))
+    if profile is None:
+        return json_response({"error": f"Unknown profile, choose from: {', '.join(profiles)}"}, 400)
     
-    weaknesses = analyzer.analyze_squad_weaknesses()
-    analysis = analyzer.generate_detailed_analysis(player_data, weaknesses)
+    with span("squad_weaknesses"):
+        weaknesses = weaknesses_for()
+    with span("detailed_analysis"):
+        analysis = analyzer_for(profile).analyze(player_data, weaknesses, fields)
     
     # If there's an error (like existing player), return it
     if analysis.get("error"):
-        return jsonify(analysis), 400
+        return json_response(analysis, 400)
+    
+    if fields is not None:
+        response = {"analysis": analysis}
+        if "player" in fields:
+            response["player"] = player_data
+        if "squad_weaknesses" in fields:
+            response["squad_weaknesses"] = weaknesses
+        if "timestamp" in fields:
+            response["timestamp"] = datetime.now().isoformat()
+        if profile is not DEFAULT:
+            response["profile"] = profile.name
+        return json_response(response)
     
-    return jsonify({
+    response = {
         "player": player_data,
         "analysis": analysis,
         "squad_weaknesses": weaknesses,
         "timestamp": datetime.now().isoformat()
-    })
+    }
+    if profile is not DEFAULT:
+        response["profile"] = profile.name
+    return json_response(response)
 
-@app.route('/api/squad/analysis')
-def squad_analysis():
-    """Get comprehensive squad analysis"""
-    weaknesses = analyzer.analyze_squad_weaknesses()
+@app.route('/api/transfer/rate', methods=['POST'])
+def rate_transfer():
+    """Rate a potential transfer with detailed analysis, or just the ?fields= asked for"""
+    snapshot = current_snapshot()
+    return rate_response(lambda profile: snapshot_analyzer(snapshot, profile), lambda: snapshot_weaknesses(snapshot))
+
+@app.route('/api/profiles')
+def scoring_profiles():
+    """Scoring profiles that /api/transfer/rate?profile= accepts"""
+    return json_response([profile.summary() for profile in profiles.values()])
+
+def build_squad_analysis(snapshot) -> Dict[str, Any]:
+    """Weaknesses, metrics and priorities of a snapshot's squad"""
+    weaknesses = snapshot_weaknesses(snapshot)
     
     # Enhanced weakness descriptions
     weakness_descriptions = {
@@ -705,7 +1015,7 @@ def squad_analysis():
     
     # Calculate additional squad metrics
     all_players = []
-    for pos_group in CURRENT_SQUAD.values():
+    for pos_group in snapshot.squad.values():
         all_players.extend(pos_group)
     
     total_value = sum(p["value"] for p in all_players)
@@ -735,7 +1045,7 @@ def squad_analysis():
     else:
         squad_strength = "below standard"
     
-    return jsonify({
+    return {
         "weaknesses": weaknesses,
         "descriptions": {w: weakness_descriptions.get(w, w) for w in weaknesses},
         "metrics": {
@@ -750,7 +1060,39 @@ def squad_analysis():
         },
         "squad_strength": squad_strength,
         "priority_positions": get_priority_transfer_positions(weaknesses)
-    })
+    }
+
+def snapshot_squad_analysis(snapshot) -> Dict[str, Any]:
+    """Squad analysis for a snapshot, built once per snapshot"""
+    return snapshot.derived('squad_analysis', build_squad_analysis)
+
+@app.route('/api/squad/analysis')
+def squad_analysis():
+    """Get comprehensive squad analysis"""
+    snapshot = current_snapshot()
+    with span("squad_analysis"):
+        analysis = snapshot_squad_analysis(snapshot)
+    return json_response(analysis)
+
+# pushes squad diffs to subscribed dashboards whenever the squad changes
+# each open stream holds a worker thread; raise BARCARATE_EVENT_STREAMS only under an async (gevent) worker
+squad_events = SquadEventBroker(current_snapshot(), snapshot_squad_analysis,
+                                int(os.environ.get('BARCARATE_EVENT_STREAMS', MAX_SUBSCRIBERS)))
+add_reload_listener(squad_events.publish)
+
+@app.route('/api/squad/events')
+def squad_event_stream():
+    """Server-sent events with a compact update every time the squad changes"""
+    if squad_events.full():
+        response = json_response({"error": "Too many open event streams, try again shortly"}, 503)
+        response.headers['Retry-After'] = '30'
+        return response
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    response = Response(squad_events.stream(last_event_id), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # keep proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 def get_priority_transfer_positions(weaknesses: List[str]) -> List[str]:
     """Get priority positions for transfers based on weaknesses"""
@@ -776,30 +1118,206 @@ def get_priority_transfer_positions(weaknesses: List[str]) -> List[str]:
 @app.route('/api/teams')
 def get_teams():
     """Get list of all La Liga teams"""
-    teams = list(set(player["team"] for player in LA_LIGA_PLAYERS))
-    teams.sort()
-    return jsonify(teams)
+    if player_db is not None:
+        return json_response(player_db.get_teams())
+    snapshot = current_snapshot()
+    return cached_json_response('teams', snapshot.version, lambda: list(snapshot.indexes.teams))
+
+@app.route('/api/rankings')
+def transfer_rankings():
+    """Every transfer candidate ranked against the current squad, paginated"""
+    snapshot = current_snapshot()
+    ranking = rankings.get(snapshot)
+    if ranking is None:
+        wait = rankings.retry_after(snapshot)
+        if wait:
+            response = json_response({"error": "Building rankings failed, it is retried later"}, 503)
+        else:
+            response = json_response({"error": "Rankings are being built, try again shortly"}, 503)
+        response.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+        return response
+    
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = max(1, min(request.args.get('per_page', 20, type=int), 100))
+    with span("filter"):
+        total, results = ranking.page(
+            page,
+            per_page,
+            position=request.args.get('position', '').upper(),
+            team=request.args.get('team', ''),
+            max_age=request.args.get('max_age', type=int),
+            max_value=request.args.get('max_value', type=int),
+            min_rating=request.args.get('min_rating', type=float)
+        )
+    
+    return json_response({
+        "data_version": ranking.data_version,
+        "stale": not ranking.is_current(snapshot),
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "results": results
+    })
+
+@app.route('/api/players/history')
+def player_history():
+    """Recorded ratings and values of one player, oldest first"""
+    if history is None:
+        return json_response({"error": "History is not enabled (set BARCARATE_HISTORY)"}, 404)
+    name = request.args.get('name', '')
+    if not name:
+        return json_response({"error": "Player name required"}, 400)
+    return json_response({"name": name, "history": history.player_history(name)})
+
+@app.route('/api/players/trends')
+def player_trends():
+    """Biggest rating or value risers (or fallers) over the last few recordings"""
+    if history is None:
+        return json_response({"error": "History is not enabled (set BARCARATE_HISTORY)"}, 404)
+    metric = request.args.get('metric', 'rating')
+    order = request.args.get('order', 'desc')
+    periods = max(1, request.args.get('periods', 1, type=int))
+    limit = max(0, min(request.args.get('limit', 20, type=int), 100))
+    
+    if order not in ("asc", "desc"):
+        return json_response({"error": "Order must be 'asc' or 'desc'"}, 400)
+    
+    try:
+        with span("filter"):
+            report = history.top_movers(metric, periods, limit, descending=(order == "desc"))
+    except ValueError as e:
+        return json_response({"error": f"Trend {e}"}, 400)
+    if report is None:
+        return json_response({"error": f"Need more than {periods} recordings, have {len(history.blocks)}"}, 400)
+    return json_response(report)
+
+# hypothetical squads, one per analyst session, sharing unchanged data with the live squad
+workspaces = WorkspaceManager(lambda squad, snapshot, profile: TransferAnalyzer(
+    squad, snapshot_percentiles(snapshot), profile, ANALYSIS_CACHE_SIZE))
+
+def workspace_summary(workspace: SquadWorkspace) -> Dict[str, Any]:
+    state = workspace.state
+    return {
+        "id": workspace.id,
+        "version": state.version,
+        "data_version": workspace.base.version,
+        "squad": state.squad,
+        "weaknesses": workspace.weaknesses(DEFAULT, state),
+        "position_counts": workspace.analyzer(DEFAULT, state).position_counts(),
+        "shared_groups": workspace.shared_groups(state)
+    }
+
+def workspace_or_404(workspace_id: str):
+    workspace = workspaces.get(workspace_id)
+    if workspace is None:
+        return None, json_response({"error": "Unknown or expired workspace"}, 404)
+    return workspace, None
+
+@app.route('/api/workspaces', methods=['POST'])
+def create_workspace():
+    """Start a private copy of the current squad to edit"""
+    return json_response(workspace_summary(workspaces.create(current_snapshot())), 201)
 
-# Serve frontend from frontend directory
+@app.route('/api/workspaces/<workspace_id>', methods=['GET', 'DELETE'])
+def workspace_detail(workspace_id):
+    """A workspace's squad, weaknesses and position counts, or drop it"""
+    if request.method == 'DELETE':
+        if not workspaces.delete(workspace_id):
+            return json_response({"error": "Unknown or expired workspace"}, 404)
+        return json_response({"deleted": workspace_id})
+    workspace, error = workspace_or_404(workspace_id)
+    return error or json_response(workspace_summary(workspace))
+
+@app.route('/api/workspaces/<workspace_id>/players', methods=['POST'])
+def workspace_add_player(workspace_id):
+    """Add a player to a workspace squad: {"group": "forwards", "player": {...}}"""
+    workspace, error = workspace_or_404(workspace_id)
+    if error:
+        return error
+    data = request.get_json(silent=True) or {}
+    try:
+        workspace.add_player(data.get('group', ''), data.get('player'))
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+    return json_response(workspace_summary(workspace))
+
+@app.route('/api/workspaces/<workspace_id>/players/<path:name>', methods=['PATCH', 'DELETE'])
+def workspace_edit_player(workspace_id, name):
+    """Change (age, rating, value, position, number) or remove a workspace squad player"""
+    workspace, error = workspace_or_404(workspace_id)
+    if error:
+        return error
+    try:
+        if request.method == 'DELETE':
+            workspace.remove_player(name)
+        else:
+            changes = request.get_json(silent=True)
+            if not isinstance(changes, dict) or not changes:
+                return json_response({"error": "Changes required"}, 400)
+            workspace.update_player(name, changes)
+    except KeyError:
+        return json_response({"error": f"{name} is not in this squad"}, 404)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+    return json_response(workspace_summary(workspace))
+
+@app.route('/api/workspaces/<workspace_id>/rate', methods=['POST'])
+def workspace_rate_transfer(workspace_id):
+    """Rate a transfer against a workspace squad instead of the real one"""
+    workspace, error = workspace_or_404(workspace_id)
+    if error:
+        return error
+    state = workspace.state
+    return rate_response(lambda profile: workspace.analyzer(profile, state), lambda: workspace.weaknesses(DEFAULT, state))
+
+@app.route('/api/stats/percentiles')
+def league_percentiles():
+    """Per-position league distributions, or where one player sits in them"""
+    if player_db is not None:
+        return json_response({"error": "League percentiles are not available with BARCARATE_DB"}, 404)
+    snapshot = current_snapshot()
+    percentiles = snapshot_percentiles(snapshot)
+    
+    name = request.args.get('name', '')
+    if name:
+        player_id = snapshot.indexes.name_index.get(normalize_string(name.strip()))
+        if player_id is None:
+            return json_response({"error": f"Unknown player: {name}"}, 400)
+        player = snapshot.players[player_id]
+        return json_response({"player": player, **percentiles.player_context(player)})
+    
+    position = request.args.get('position', '').upper()
+    if position:
+        distribution = percentiles.distribution(position)
+        if distribution is None:
+            return json_response({"error": f"Unknown position: {position}"}, 400)
+        return json_response({position: distribution})
+    
+    return json_response({pos: percentiles.distribution(pos) for pos in percentiles.positions()})
+
+# Serve frontend: hashed, pre-compressed files from frontend/dist when built
+# (python static_assets.py), otherwise straight from frontend/
 @app.route('/')
 def serve_frontend():
-    return send_from_directory('frontend', 'index.html')
+    if static_assets.is_built():
+        return static_assets.send_precompressed(static_assets.DIST_DIR, 'index.html', static_assets.REVALIDATE)
+    return static_assets.send_source('', 'index.html')
+
+@app.route('/assets/<path:path>')
+def serve_assets(path):
+    return static_assets.send_precompressed(static_assets.ASSETS_DIR, path, static_assets.IMMUTABLE)
 
 @app.route('/styles/<path:path>')
 def serve_styles(path):
-    return send_from_directory('frontend/styles', path)
+    return static_assets.send_source('styles', path)
 
 @app.route('/js/<path:path>')
 def serve_js(path):
-    return send_from_directory('frontend/js', path)
+    return static_assets.send_source('js', path)
 
 @app.route('/<path:path>')
 def serve_static(path):
-    # Try frontend directory first, fall back to root
-    try:
-        return send_from_directory('frontend', path)
-    except:
-        return send_from_directory('.', path)
+    return static_assets.send_source('', path)
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=8000)
\ No newline at end of file
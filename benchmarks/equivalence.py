@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+equivalence harness
+runs the reference rating and search against every optimized engine on a
+synthetic league (see synthetic_league.py) and fails on the first output
+that differs. ratings, breakdowns and search results have to match exactly,
+not approximately.
+
+the references are frozen copies of the original code: the rating is the
+original TransferAnalyzer in reference_scoring.py, the search is the linear
+scan search_players was before it had indexes. typeahead has no original,
+its reference is a linear scan of what suggest promises: every player with a
+name word starting with the prefix, best rated first, ties in list order. "plain" is today's
+TransferAnalyzer without caches or projection, so refactors of the scoring
+itself are checked too. league_context, which the original did not have,
+is not compared. ratings are streamed in chunks so millions of players run in
+flat memory; search engines need the whole league loaded, so they run on the
+first --search-players players only, and so does typeahead.
+
+an engine is a factory in RATING_ENGINES or SEARCH_ENGINES, add one there to
+check a new implementation:
+    rating: factory(squad, league) -> (rate(player) -> analysis, fields compared or None for all)
+    search: factory(players, workdir) -> search(query, position, team, min_rating, max_age, max_value, limit)
+    suggest: factory(players, workdir) -> suggest(folded prefix, limit) -> [(id, name)]
+
+usage:
+    python benchmarks/equivalence.py --players 100000
+    python benchmarks/equivalence.py --players 10000000 --search-players 200000 --queries 1000
+    python benchmarks/equivalence.py --rating-engines cached --search-engines sqlite
+    python benchmarks/equivalence.py --rating-engines '' --search-engines '' --suggest-engines sqlite
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from itertools import islice
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import ANALYSIS_CACHE_SIZE, RANKING_FIELDS, TransferAnalyzer
+from league_stats import LeaguePercentiles
+from player_store import SQLitePlayerStore, build_database
+from players_database import POSITIONS, PlayerIndexes, current_snapshot, normalize_string
+from scoring_profiles import DEFAULT
+from sharded_search import ShardedPlayerStore
+from synthetic_league import generate_players
+
+import reference_scoring
+
+# worker processes for the sharded search engine
+SHARDED_WORKERS = 4
+
+# analysis keys added after the original scoring, not compared
+LATER_FIELDS = ("league_context",)
+
+def reference_rating(squad, league):
+    analyzer = reference_scoring.TransferAnalyzer(squad)
+    weaknesses = analyzer.analyze_squad_weaknesses()
+    return lambda player: analyzer.generate_detailed_analysis(player, weaknesses)
+
+def reference_search(players):
+    """search_players as it was before indexes: filter everything, stable sort by rating"""
+    def search(query, position, team, min_rating, max_age, max_value, limit):
+        query = normalize_string(query.lower())
+        position = position.upper()
+        results = [
+            p for p in players
+            if (not query or query in normalize_string(p["name"]))
+            and (not position or p["position"] == position)
+            and (not team or team.lower() in p["team"].lower())
+            and (min_rating <= 0 or p["rating"] >= min_rating)
+            and (max_age >= 50 or p["age"] <= max_age)
+            and (max_value >= 999999999 or p["value"] <= max_value)
+        ]
+        results.sort(key=lambda x: x["rating"], reverse=True)
+        return results[:limit]
+    return search
+
+def reference_suggest(players):
+    """Every player with a folded name word starting with the prefix, best rated first"""
+    folded = [normalize_string(p["name"]) for p in players]
+    def suggest(prefix, limit):
+        matches = []
+        for player_id, name in enumerate(folded):
+            words = name.split()
+            if any(" ".join(words[i:]).startswith(prefix) for i in range(len(words))):
+                matches.append(player_id)
+        matches.sort(key=lambda i: (-players[i]["rating"], i))
+        return [(i, players[i]["name"]) for i in matches[:limit]]
+    return suggest
+
+def plain_rating(squad, league):
+    # today's scoring, full analysis, nothing cached
+    analyzer = TransferAnalyzer(squad, league)
+    weaknesses = analyzer.analyze_squad_weaknesses()
+    return (lambda player: analyzer.generate_detailed_analysis(player, weaknesses)), None
+
+def cached_rating(squad, league):
+    # what the app serves: the per-snapshot analyzer with its result cache
+    analyzer = TransferAnalyzer(squad, league, DEFAULT, ANALYSIS_CACHE_SIZE)
+    weaknesses = analyzer.analyze_squad_weaknesses()
+    return (lambda player: analyzer.analyze(player, weaknesses)), None
+
+def projected_rating(squad, league):
+    # what rankings compute: only the fields they keep, no text
+    analyzer = TransferAnalyzer(squad, league)
+    weaknesses = analyzer.analyze_squad_weaknesses()
+    return (lambda player: analyzer.generate_detailed_analysis(player, weaknesses, RANKING_FIELDS)), RANKING_FIELDS
+
+def indexes_search(players, workdir):
+    indexes = PlayerIndexes(players)
+    def search(query, position, team, min_rating, max_age, max_value, limit):
+        return indexes.search(normalize_string(query.lower()), position.upper(), team,
+                              min_rating, max_age, max_value, limit)
+    return search
+
+def sqlite_search(players, workdir):
+    path = os.path.join(workdir, "players.db")
+    build_database(path, players)
+    store = SQLitePlayerStore(path)
+    def search(query, position, team, min_rating, max_age, max_value, limit):
+        return store.search_players(normalize_string(query.lower()), position.upper(), team,
+                                    min_rating, max_age, max_value, limit)
+    return search
+
+def sharded_search(players, workdir):
+    store = ShardedPlayerStore(SHARDED_WORKERS)
+    store.load(players)
+    def search(query, position, team, min_rating, max_age, max_value, limit):
+        return store.search_players(normalize_string(query.lower()), position.upper(), team,
+                                    min_rating, max_age, max_value, limit)
+    return search
+
+def indexes_suggest(players, workdir):
+    return PlayerIndexes(players).suggest
+
+def sqlite_suggest(players, workdir):
+    path = os.path.join(workdir, "suggest.db")
+    build_database(path, players)
+    store = SQLitePlayerStore(path)
+    return lambda prefix, limit: [tuple(match) for match in store.suggest_players(prefix, limit)]
+
+def sharded_suggest(players, workdir):
+    store = ShardedPlayerStore(SHARDED_WORKERS)
+    store.load(players)
+    return store.suggest_players
+
+RATING_ENGINES: Dict[str, Callable] = {
+    "plain": plain_rating,
+    "cached": cached_rating,
+    "projected": projected_rating,
+}
+
+SEARCH_ENGINES: Dict[str, Callable] = {
+    "indexes": indexes_search,
+    "sqlite": sqlite_search,
+    "sharded": sharded_search,
+}
+
+SUGGEST_ENGINES: Dict[str, Callable] = {
+    "indexes": indexes_suggest,
+    "sqlite": sqlite_suggest,
+    "sharded": sharded_suggest,
+}
+
+def chunks(iterable, size: int):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def random_queries(players: List[Dict], count: int, seed: int) -> List[Tuple]:
+    """A seeded mix of what people type: name fragments, filters, both, or nothing"""
+    rng = random.Random(seed)
+    teams = sorted(set(p["team"] for p in players))
+    queries = []
+    for _ in range(count):
+        player = rng.choice(players)
+        name = player["name"]
+        start = rng.randrange(len(name))
+        fragment = name[start:start + rng.randint(2, 7)]
+        if rng.random() < 0.3:
+            fragment = normalize_string(fragment)
+        if rng.random() < 0.2:
+            fragment = fragment.upper()
+        kind = rng.random()
+        query = "" if kind < 0.25 else fragment
+        position = rng.choice(POSITIONS) if rng.random() < 0.4 else ""
+        if rng.random() < 0.2:
+            position = position.lower()
+        team = ""
+        if rng.random() < 0.25:
+            team = rng.choice(teams)
+            team = team[:rng.randint(3, len(team))].lower()
+        min_rating = rng.choice((0, 0, 70, 75, 80, 85))
+        max_age = rng.choice((50, 50, 21, 25, 30))
+        max_value = rng.choice((999999999, 999999999, 5000000, 20000000, 60000000))
+        limit = rng.choice((30, 30, 30, 5, 100))
+        queries.append((query, position, team, min_rating, max_age, max_value, limit))
+    return queries
+
+def random_prefixes(players: List[Dict], count: int, seed: int) -> List[Tuple]:
+    """Seeded typeahead input: the start of any name word, sometimes running into the next one"""
+    rng = random.Random(seed)
+    prefixes = []
+    for _ in range(count):
+        words = normalize_string(rng.choice(players)["name"]).split()
+        if not words:
+            continue
+        rest = " ".join(words[rng.randrange(len(words)):])
+        prefixes.append((rest[:rng.randint(1, min(len(rest), 12))], rng.choice((8, 8, 10, 3))))
+    return prefixes
+
+def diff_analysis(expected: Dict, actual: Dict, fields) -> List[str]:
+    if expected.get("error"):
+        # the already-in-squad error is returned whole whatever fields were asked for
+        fields = None
+    keys = list(expected) if fields is None else [key for key in fields if key in expected]
+    problems = [f"{key}: expected {expected[key]!r}, got {actual.get(key, '<missing>')!r}"
+                for key in keys if actual.get(key, object()) != expected[key]]
+    extra = [key for key in actual if key not in keys and key not in LATER_FIELDS]
+    if extra:
+        problems.append(f"unexpected keys {extra}")
+    return problems
+
+def diff_results(expected: List[Dict], actual: List[Dict]) -> List[str]:
+    if actual == expected:
+        return []
+    for i, (want, got) in enumerate(zip(expected, actual)):
+        if want != got:
+            return [f"result {i}: expected {want!r}, got {got!r}"]
+    return [f"expected {len(expected)} results, got {len(actual)}"]
+
+class Report:
+    """Seconds, items and mismatches per engine"""
+
+    def __init__(self, engines: List[str], max_diffs: int):
+        self.seconds = {engine: 0.0 for engine in engines}
+        self.items = {engine: 0 for engine in engines}
+        self.mismatches = {engine: 0 for engine in engines}
+        self.max_diffs = max_diffs
+        self.shown = 0
+
+    def timed(self, engine: str, fn, *args):
+        started = time.perf_counter()
+        result = fn(*args)
+        self.seconds[engine] += time.perf_counter() - started
+        self.items[engine] += 1
+        return result
+
+    def mismatch(self, engine: str, what: str, problems: List[str]):
+        self.mismatches[engine] += 1
+        if self.shown < self.max_diffs:
+            self.shown += 1
+            print(f"  MISMATCH {engine} on {what}:")
+            for problem in problems:
+                print(f"    {problem}")
+
+    def print(self, unit: str):
+        reference = self.seconds["reference"] / max(self.items["reference"], 1)
+        print(f"  {'engine':<14}{unit + '/s':>14}{'us each':>12}{'speedup':>10}{'mismatches':>12}")
+        for engine, seconds in self.seconds.items():
+            each = seconds / max(self.items[engine], 1)
+            rate = self.items[engine] / seconds if seconds else float("inf")
+            speedup = reference / each if each else float("inf")
+            print(f"  {engine:<14}{rate:>14,.0f}{each * 1e6:>12.1f}{speedup:>9.1f}x{self.mismatches[engine]:>12}")
+
+    @property
+    def failed(self) -> bool:
+        return any(self.mismatches.values())
+
+def check_ratings(args, engines: List[str], league: LeaguePercentiles) -> Report:
+    squad = current_snapshot().squad
+    reference = reference_rating(squad, league)
+    raters = {engine: RATING_ENGINES[engine](squad, league) for engine in engines}
+    report = Report(["reference"] + engines, args.max_diffs)
+
+    done = 0
+    for chunk in chunks(generate_players(args.players, args.seed), args.chunk):
+        expected = [report.timed("reference", reference, player) for player in chunk]
+        for engine, (rate, fields) in raters.items():
+            for player, want in zip(chunk, expected):
+                got = report.timed(engine, rate, player)
+                problems = diff_analysis(want, got, fields)
+                if problems:
+                    report.mismatch(engine, player["name"], problems)
+        done += len(chunk)
+        if done % (args.chunk * 10) == 0:
+            print(f"  ... {done:,} players", file=sys.stderr)
+    return report
+
+def check_search(args, engines: List[str], players: List[Dict]) -> Report:
+    reference = reference_search(players)
+    report = Report(["reference"] + engines, args.max_diffs)
+    queries = random_queries(players, args.queries, args.seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        searchers = {}
+        for engine in engines:
+            started = time.perf_counter()
+            searchers[engine] = SEARCH_ENGINES[engine](players, workdir)
+            print(f"  {engine} built in {time.perf_counter() - started:.2f}s")
+        for query in queries:
+            expected = report.timed("reference", reference, *query)
+            for engine, search in searchers.items():
+                problems = diff_results(expected, report.timed(engine, search, *query))
+                if problems:
+                    report.mismatch(engine, repr(query), problems)
+    return report
+
+def check_suggest(args, engines: List[str], players: List[Dict]) -> Report:
+    reference = reference_suggest(players)
+    report = Report(["reference"] + engines, args.max_diffs)
+    prefixes = random_prefixes(players, args.queries, args.seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        suggesters = {}
+        for engine in engines:
+            started = time.perf_counter()
+            suggesters[engine] = SUGGEST_ENGINES[engine](players, workdir)
+            print(f"  {engine} built in {time.perf_counter() - started:.2f}s")
+        for prefix, limit in prefixes:
+            expected = report.timed("reference", reference, prefix, limit)
+            for engine, suggest in suggesters.items():
+                got = report.timed(engine, suggest, prefix, limit)
+                if got != expected:
+                    report.mismatch(engine, repr(prefix), [f"expected {expected!r}", f"got {got!r}"])
+    return report
+
+def engine_list(raw: str, registry: Dict[str, Callable], parser) -> List[str]:
+    engines = [name.strip() for name in raw.split(",") if name.strip()] if raw != "all" else list(registry)
+    unknown = [name for name in engines if name not in registry]
+    if unknown:
+        parser.error(f"unknown engines {', '.join(unknown)} (choose from {', '.join(registry)})")
+    return engines
+
+def main():
+    parser = argparse.ArgumentParser(description="check optimized rating and search engines against the reference")
+    parser.add_argument("--players", type=int, default=100000, help="synthetic players to rate")
+    parser.add_argument("--search-players", type=int, help="players loaded for search (default: --players, at most 200k)")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--chunk", type=int, default=10000, help="players generated and rated at a time")
+    parser.add_argument("--rating-engines", default="all", help="comma separated, or 'all' / '' for none")
+    parser.add_argument("--search-engines", default="all", help="comma separated, or 'all' / '' for none")
+    parser.add_argument("--suggest-engines", default="all", help="comma separated, or 'all' / '' for none")
+    parser.add_argument("--max-diffs", type=int, default=10, help="mismatches printed in full")
+    args = parser.parse_args()
+
+    rating_engines = engine_list(args.rating_engines, RATING_ENGINES, parser)
+    search_engines = engine_list(args.search_engines, SEARCH_ENGINES, parser)
+    suggest_engines = engine_list(args.suggest_engines, SUGGEST_ENGINES, parser)
+    search_count = args.search_players if args.search_players is not None else min(args.players, 200000)
+
+    # percentiles for league_context come from the searchable part of the league
+    players = list(generate_players(search_count, args.seed))
+    league = LeaguePercentiles(players)
+
+    failed = False
+    if rating_engines:
+        print(f"ratings: {args.players:,} players, seed {args.seed}")
+        report = check_ratings(args, rating_engines, league)
+        report.print("players")
+        failed |= report.failed
+    if search_engines:
+        print(f"\nsearch: {args.queries:,} queries over {len(players):,} players, seed {args.seed}")
+        report = check_search(args, search_engines, players)
+        report.print("queries")
+        failed |= report.failed
+    if suggest_engines:
+        print(f"\ntypeahead: {args.queries:,} prefixes over {len(players):,} players, seed {args.seed}")
+        report = check_suggest(args, suggest_engines, players)
+        report.print("prefixes")
+        failed |= report.failed
+
+    print("\nFAILED: engines disagree with the reference" if failed else "\nall engines match the reference")
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
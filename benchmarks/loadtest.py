@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+load test for the barcarate api
+drives a running server on localhost with a production-like traffic mix:
+search keystroke streams built from real player names, transfer rating posts
+and squad analysis polls. requests are issued open-loop at a fixed rate by a
+pool of concurrent clients, and latency is measured from each request's
+scheduled start so a slow server cannot hide its own backlog.
+
+every client comes from 127.0.0.1, so against a server with admission
+control they all share one rate limit bucket and mostly measure 429s. those
+are reported as throttled, apart from errors; --serve starts the server
+under test itself with admission control off (--admission keeps it on).
+
+usage:
+    python benchmarks/loadtest.py --serve --rate 100 --duration 30 --clients 32
+    BARCARATE_ADMISSION=0 python app.py &
+    python benchmarks/loadtest.py --mix search=50,rate=40,analysis=10
+"""
+
+import argparse
+import json
+import os
+import queue
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from players_database import LA_LIGA_PLAYERS
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+DEFAULT_MIX = "search=70,rate=10,analysis=20"
+
+class TrafficMix:
+    """Produces the next request to send according to the configured weights"""
+
+    def __init__(self, weights: Dict[str, int], seed: int):
+        self.kinds = list(weights)
+        self.weights = [weights[kind] for kind in self.kinds]
+        self.random = random.Random(seed)
+        self.names = [p["name"] for p in LA_LIGA_PLAYERS]
+        self.targets = [p for p in LA_LIGA_PLAYERS if p["team"] != "FC Barcelona"]
+        self._keystrokes = iter(())
+        self._lock = threading.Lock()
+
+    def _next_keystroke(self) -> str:
+        # one stream is somebody typing a player's name, one request per key
+        query = next(self._keystrokes, None)
+        if query is None:
+            name = self.random.choice(self.names)
+            typed = name[:self.random.randint(3, len(name))]
+            self._keystrokes = iter(typed[:i] for i in range(2, len(typed) + 1))
+            query = next(self._keystrokes)
+        return query
+
+    def next_request(self) -> Tuple[str, str, str, dict]:
+        """(route label, method, path, requests kwargs)"""
+        with self._lock:
+            kind = self.random.choices(self.kinds, self.weights)[0]
+            if kind == "search":
+                return "search", "GET", "/api/players/search", {"params": {"q": self._next_keystroke()}}
+            if kind == "rate":
+                return "rate", "POST", "/api/transfer/rate", {"json": self.random.choice(self.targets)}
+            return "analysis", "GET", "/api/squad/analysis", {}
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    weights = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in ("search", "rate", "analysis"):
+            raise ValueError(f"unknown request kind in mix: {kind}")
+        weights[kind] = int(weight)
+    if not any(weights.values()):
+        raise ValueError("mix needs at least one non-zero weight")
+    return weights
+
+def check_localhost(base_url: str):
+    host = urlparse(base_url).hostname
+    if host not in LOCAL_HOSTS:
+        sys.exit(f"error: load tests only run against localhost, got {host!r}")
+
+def start_server(base_url: str, admission: bool, wait: float = 30.0) -> subprocess.Popen:
+    """Run the app on base_url's port, admission control off unless asked for, once it answers"""
+    url = urlparse(base_url)
+    env = dict(os.environ, BARCARATE_ADMISSION="1" if admission else "0")
+    code = f"from app import app; app.run(host={url.hostname!r}, port={url.port or 80}, threaded=True)"
+    server = subprocess.Popen([sys.executable, "-c", code], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            sys.exit(f"error: server exited with status {server.returncode}, is {base_url} already in use?")
+        try:
+            requests.get(base_url + "/api/squad", timeout=1)
+            return server
+        except requests.RequestException:
+            time.sleep(0.2)
+    server.terminate()
+    sys.exit(f"error: server did not answer on {base_url} within {wait:g}s")
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class Recorder:
+    """Collects per-route latencies and outcomes from all client threads"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.throttled = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, route: str, latency: float, status):
+        with self._lock:
+            self.latencies[route].append(latency)
+            self.statuses[route][status] += 1
+            # rate limited by admission control, not a failure of the route itself
+            if status == 429:
+                self.throttled[route] += 1
+            elif not isinstance(status, int) or status >= 400:
+                self.errors[route] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, dict]:
+        report = {}
+        with self._lock:
+            for route, values in sorted(self.latencies.items()):
+                values = sorted(values)
+                report[route] = {
+                    "requests": len(values),
+                    "throughput": round(len(values) / elapsed, 1),
+                    "error_rate": round(self.errors[route] / len(values), 4),
+                    "throttled_rate": round(self.throttled[route] / len(values), 4),
+                    "p50_ms": round(percentile(values, 50) * 1000, 1),
+                    "p95_ms": round(percentile(values, 95) * 1000, 1),
+                    "p99_ms": round(percentile(values, 99) * 1000, 1),
+                    "statuses": {str(k): v for k, v in sorted(self.statuses[route].items(), key=str)},
+                }
+        return report
+
+def client_worker(base_url: str, jobs: queue.Queue, recorder: Recorder, timeout: float):
+    session = requests.Session()
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        scheduled, (route, method, path, kwargs) = job
+        try:
+            response = session.request(method, base_url + path, timeout=timeout, **kwargs)
+            status = response.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        recorder.record(route, time.perf_counter() - scheduled, status)
+
+def run(base_url: str, rate: float, duration: float, clients: int, mix: TrafficMix, timeout: float) -> Dict[str, dict]:
+    jobs = queue.Queue()
+    recorder = Recorder()
+    workers = [
+        threading.Thread(target=client_worker, args=(base_url, jobs, recorder, timeout), daemon=True)
+        for _ in range(clients)
+    ]
+    for worker in workers:
+        worker.start()
+
+    # open-loop schedule: request i is due at start + i / rate regardless of responses
+    start = time.perf_counter()
+    total = int(rate * duration)
+    for i in range(total):
+        due = start + i / rate
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        jobs.put((due, mix.next_request()))
+
+    for _ in workers:
+        jobs.put(None)
+    for worker in workers:
+        worker.join()
+    return recorder.summary(time.perf_counter() - start)
+
+def print_report(report: Dict[str, dict]):
+    print(f"{'route':<10}{'reqs':>8}{'req/s':>9}{'errors':>9}{'429s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  statuses")
+    for route, stats in report.items():
+        statuses = " ".join(f"{k}:{v}" for k, v in stats["statuses"].items())
+        print(f"{route:<10}{stats['requests']:>8}{stats['throughput']:>9}{stats['error_rate']:>9.1%}"
+              f"{stats['throttled_rate']:>9.1%}{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}  {statuses}")
+    if any(stats["throttled_rate"] for stats in report.values()):
+        print("\nsome requests were rate limited (429): latencies include them. to measure the server rather than"
+              "\nits rate limiter use --serve or run it with BARCARATE_ADMISSION=0", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="load test a local barcarate server")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rate", type=float, default=50.0, help="total requests per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds to run")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent client connections")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="weights, e.g. search=70,rate=10,analysis=20")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="print the report as json")
+    parser.add_argument("--serve", action="store_true",
+                        help="start the server under test on --base-url's port, with admission control off")
+    parser.add_argument("--admission", action="store_true", help="with --serve, keep admission control on")
+    args = parser.parse_args()
+
+    check_localhost(args.base_url)
+    if args.admission and not args.serve:
+        parser.error("--admission only applies with --serve")
+    try:
+        mix = TrafficMix(parse_mix(args.mix), args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+
+    base_url = args.base_url.rstrip("/")
+    server = start_server(base_url, args.admission) if args.serve else None
+    if not args.json:
+        print(f"{args.rate:g} req/s for {args.duration:g}s, {args.clients} clients, mix {args.mix}\n")
+    try:
+        report = run(base_url, args.rate, args.duration, args.clients, mix, args.timeout)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+if __name__ == '__main__':
+    main()
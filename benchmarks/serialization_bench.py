@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+serialization benchmark
+times how long each endpoint spends turning its payload into response bytes,
+comparing flask's jsonify (before) with the serialization module (after)
+
+usage: python benchmarks/serialization_bench.py [--iterations N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import jsonify
+
+import serialization
+from app import app, analyzer
+from players_database import CURRENT_SQUAD, LA_LIGA_PLAYERS, get_data_version, get_teams
+
+def endpoint_payloads():
+    """(endpoint, payload, is static) for a representative request to each endpoint"""
+    search_results = sorted(LA_LIGA_PLAYERS, key=lambda x: x["rating"], reverse=True)[:30]
+    target = next(p for p in LA_LIGA_PLAYERS if p["team"] != "FC Barcelona")
+    weaknesses = analyzer.analyze_squad_weaknesses()
+    with app.test_request_context():
+        squad_analysis = app.view_functions["squad_analysis"]().get_json()
+    return [
+        ("/api/squad", CURRENT_SQUAD, True),
+        ("/api/teams", get_teams(), True),
+        ("/api/players/search", search_results, False),
+        ("/api/transfer/rate", {
+            "player": target,
+            "analysis": analyzer.generate_detailed_analysis(target, weaknesses),
+            "squad_weaknesses": weaknesses,
+            "timestamp": "2025-08-01T12:00:00",
+        }, False),
+        ("/api/squad/analysis", squad_analysis, False),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark response serialization per endpoint")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    encoder = "orjson" if serialization.orjson is not None else "stdlib json"
+    print(f"encoder: {encoder}, iterations: {args.iterations}\n")
+    print(f"{'endpoint':<24}{'before (us)':>14}{'after (us)':>14}{'speedup':>10}")
+
+    with app.test_request_context():
+        for endpoint, payload, static in endpoint_payloads():
+            before = timeit.timeit(lambda: jsonify(payload).get_data(), number=args.iterations)
+            if static:
+                version = get_data_version()
+                after_fn = lambda: serialization.cached_json_response(endpoint, version, lambda: payload).get_data()
+            else:
+                after_fn = lambda: serialization.json_response(payload).get_data()
+            after = timeit.timeit(after_fn, number=args.iterations)
+
+            before_us = before / args.iterations * 1e6
+            after_us = after / args.iterations * 1e6
+            print(f"{endpoint:<24}{before_us:>14.1f}{after_us:>14.1f}{before_us / after_us:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Streaming bulk import and export of players.
+
+Scouting dumps arrive as CSV or NDJSON files of thousands of players. The
+importer reads them a row at a time, validates every row with the same
+validate_player the data files use and hands the valid players on in
+chunks, so parsing never holds more than one chunk no matter how big the
+file is. Bad rows are skipped and reported with their line number. The
+merged player list is the live data, so it is held in memory in full: a
+server import is bounded by memory like the rest of the data, while the
+command line import into --out or --db streams straight through.
+
+CSV files need a header row with name, age, rating, value, position and
+team; league and number are optional and other columns are ignored. NDJSON
+files have one player object per line.
+
+The export goes the other way: transfer candidates (everyone not already in
+the squad) with their generate_detailed_analysis rating, rated and encoded
+a chunk at a time as NDJSON ({"player", "analysis"} per line) or CSV
+(player columns plus the rating and its breakdown).
+
+    python bulk_players.py import scouting.csv --out data.json      # a BARCARATE_DATA_FILE
+    python bulk_players.py import scouting.ndjson --db scouting.db  # a BARCARATE_DB store
+    python bulk_players.py export --format csv --out ratings.csv
+    python bulk_players.py export --from scouting.ndjson --profile rebuild --out ratings.ndjson
+
+The server takes the same files on POST /api/players/import (with
+BARCARATE_IMPORT_TOKEN set) and streams the export from GET
+/api/players/export.
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from players_database import current_snapshot, normalize_string, publish_snapshot, validate_player
+from serialization import dumps
+from synthetic_league import write_data_file
+
+FORMATS = ("csv", "ndjson")
+
+# rows parsed, validated and merged (or rated and encoded) at a time
+CHUNK_SIZE = 1000
+
+# rejected rows listed in an import report, the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+# columns a CSV import reads and a CSV export writes
+PLAYER_COLUMNS = ("name", "age", "rating", "value", "position", "team", "league", "number")
+REQUIRED_COLUMNS = ("name", "age", "rating", "value", "position", "team")
+INTEGER_COLUMNS = ("age", "rating", "value", "number")
+
+# the rating part of a CSV export row
+ANALYSIS_COLUMNS = ("transfer_rating", "recommendation", "quality", "age_impact", "financial_risk",
+                    "position_need", "special_factors", "raw_total")
+BREAKDOWN_COLUMNS = ANALYSIS_COLUMNS[2:]
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+def format_for(name: Optional[str]) -> Optional[str]:
+    """Import/export format from a file name or a content type, None if neither says"""
+    if not name:
+        return None
+    name = name.lower()
+    if name.endswith((".csv", "/csv")):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl", "/x-ndjson", "/ndjson", "/jsonl")):
+        return "ndjson"
+    return None
+
+class ImportReport:
+    """Row counts and the first few rejected rows of one import"""
+
+    def __init__(self):
+        self.rows = 0
+        self.rejected = 0
+        self.added = 0
+        self.updated = 0
+        self.errors: List[Dict] = []
+
+    def reject(self, line: int, message: str):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def summary(self) -> Dict:
+        return {
+            "rows": self.rows,
+            "imported": self.rows - self.rejected,
+            "added": self.added,
+            "updated": self.updated,
+            "rejected": self.rejected,
+            "errors": self.errors,
+        }
+
+def _csv_records(text: TextIO) -> Iterator[Tuple[int, object]]:
+    reader = csv.DictReader(text)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"CSV header is missing {', '.join(missing)}")
+    for row in reader:
+        player = {}
+        for column in PLAYER_COLUMNS:
+            value = (row.get(column) or "").strip()
+            if not value:
+                continue
+            if column in INTEGER_COLUMNS:
+                try:
+                    value = int(value)
+                except ValueError:
+                    pass  # left as text, validate_player names the column
+            player[column] = value
+        yield reader.line_num, player
+
+def _ndjson_records(text: TextIO) -> Iterator[Tuple[int, object]]:
+    for line_number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f"invalid JSON: {e}")
+
+def read_players(text: TextIO, fmt: str, report: ImportReport, chunk_size: int = CHUNK_SIZE) -> Iterator[List[Dict]]:
+    """Valid players from a CSV/NDJSON stream in chunks, bad rows go to the report"""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    records = _csv_records(text) if fmt == "csv" else _ndjson_records(text)
+    chunk = []
+    for line_number, record in records:
+        report.rows += 1
+        try:
+            if isinstance(record, ValueError):
+                raise record
+            validate_player(record)
+        except ValueError as e:
+            report.reject(line_number, str(e))
+            continue
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def merge_players(existing: Sequence[Dict], chunks: Iterable[List[Dict]], report: ImportReport,
+                  replace: bool = False) -> List[Dict]:
+    """Existing players (none when replacing) with imported ones added, or updated by name"""
+    players = [] if replace else list(existing)
+    positions = {normalize_string(player["name"]): i for i, player in enumerate(players)}
+    for chunk in chunks:
+        for player in chunk:
+            key = normalize_string(player["name"])
+            i = positions.get(key)
+            if i is None:
+                positions[key] = len(players)
+                players.append(player)
+                report.added += 1
+            else:
+                players[i] = player
+                report.updated += 1
+    return players
+
+# one import at a time, so concurrent imports cannot drop each other's players
+_import_lock = threading.Lock()
+
+def import_players(text: TextIO, fmt: str, replace: bool = False, strict: bool = False) -> Tuple[ImportReport, bool]:
+    """Stream a player file into the live data, returning (report, whether a new snapshot was published)"""
+    report = ImportReport()
+    with _import_lock:
+        snapshot = current_snapshot()
+        players = merge_players(snapshot.players, read_players(text, fmt, report), report, replace)
+        if (strict and report.rejected) or not (report.added or report.updated):
+            return report, False
+        publish_snapshot(players, snapshot.squad)
+    return report, True
+
+def _csv_line(values) -> str:
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\n").writerow(values)
+    return out.getvalue()
+
+def export_players(players: Iterable[Dict], rate: Callable[[Dict], Dict], fmt: str,
+                   chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """NDJSON or CSV body of players and their ratings, one encoded chunk at a time"""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    if fmt == "csv":
+        yield _csv_line(PLAYER_COLUMNS + ANALYSIS_COLUMNS).encode("utf-8")
+    chunk = []
+    for player in players:
+        chunk.append(player)
+        if len(chunk) >= chunk_size:
+            yield _encode_chunk(chunk, rate, fmt)
+            chunk = []
+    if chunk:
+        yield _encode_chunk(chunk, rate, fmt)
+
+def _encode_chunk(players: List[Dict], rate: Callable[[Dict], Dict], fmt: str) -> bytes:
+    if fmt == "ndjson":
+        return b"".join(dumps({"player": player, "analysis": rate(player)}) + b"\n" for player in players)
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    for player in players:
+        analysis = rate(player)
+        breakdown = analysis.get("breakdown", {})
+        writer.writerow(
+            [player.get(column, "") for column in PLAYER_COLUMNS]
+            + [analysis.get("rating", ""), analysis.get("recommendation", "")]
+            + [breakdown.get(column, "") for column in BREAKDOWN_COLUMNS]
+        )
+    return out.getvalue().encode("utf-8")
+
+def _open_text(path: Optional[str], mode: str) -> TextIO:
+    if path is None or path == "-":
+        stream = sys.stdin if "r" in mode else sys.stdout
+        return open(stream.fileno(), mode, encoding="utf-8", newline="", closefd=False)
+    return open(path, mode, encoding="utf-8", newline="")
+
+def main():
+    parser = argparse.ArgumentParser(description="bulk import and export of players in CSV or NDJSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("import", help="validate a player file into a data file or a SQLite store")
+    load.add_argument("source", help="CSV or NDJSON file, - for stdin")
+    load.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    target = load.add_mutually_exclusive_group(required=True)
+    target.add_argument("--out", help="write a JSON data file (BARCARATE_DATA_FILE format)")
+    target.add_argument("--db", help="build a SQLite player store (BARCARATE_DB)")
+    load.add_argument("--strict", action="store_true", help="exit with an error if any row is rejected")
+    export = commands.add_parser("export", help="players with their transfer ratings")
+    export.add_argument("--from", dest="source", help="CSV or NDJSON file to rate (default: the current players)")
+    export.add_argument("--format", choices=FORMATS, help="default: from --out, else ndjson")
+    export.add_argument("--profile", default="default", help="scoring profile")
+    export.add_argument("--out", help="output file (default stdout)")
+    args = parser.parse_args()
+
+    fmt = args.format or format_for(args.source if args.command == "import" else args.out)
+    if args.command == "import":
+        if fmt is None:
+            parser.error("cannot tell the format from the file name, pass --format")
+        report = ImportReport()
+        with _open_text(args.source, "r") as text:
+            players = (player for chunk in read_players(text, fmt, report) for player in chunk)
+            if args.db:
+                from player_store import build_database
+                build_database(args.db, players)
+            else:
+                with open(args.out, "w", encoding="utf-8") as out:
+                    write_data_file(out, players)
+        summary = report.summary()
+        print(f"imported {summary['imported']} of {summary['rows']} rows to {args.db or args.out}", file=sys.stderr)
+        for error in summary["errors"]:
+            print(f"  line {error['line']}: {error['error']}", file=sys.stderr)
+        if report.rejected > len(summary["errors"]):
+            print(f"  ... {report.rejected - len(summary['errors'])} more rejected rows", file=sys.stderr)
+        if args.strict and report.rejected:
+            sys.exit(1)
+        return
+
+    # the analyzer lives in the app module, which imports this one
+    from app import profiles, snapshot_analyzer, snapshot_weaknesses
+    profile = profiles.get(args.profile)
+    if profile is None:
+        parser.error(f"unknown profile, choose from: {', '.join(profiles)}")
+    snapshot = current_snapshot()
+    analyzer = snapshot_analyzer(snapshot, profile)
+    weaknesses = snapshot_weaknesses(snapshot)
+    fmt = fmt or "ndjson"
+
+    report = ImportReport()
+    if args.source:
+        source_format = format_for(args.source)
+        if source_format is None:
+            parser.error("cannot tell the format of --from from its file name")
+        text = _open_text(args.source, "r")
+        players = (player for chunk in read_players(text, source_format, report) for player in chunk)
+    else:
+        text = None
+        players = snapshot.players
+    try:
+        with open(args.out, "wb") if args.out else open(sys.stdout.fileno(), "wb", closefd=False) as out:
+            candidates = (player for player in players if not analyzer.check_existing_player(player["name"]))
+            for data in export_players(candidates, lambda p: analyzer.generate_detailed_analysis(p, weaknesses), fmt):
+                out.write(data)
+    finally:
+        if text is not None:
+            text.close()
+    if report.rejected:
+        print(f"skipped {report.rejected} invalid rows of {args.source}", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
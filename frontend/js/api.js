@@ -10,12 +10,32 @@ const API = {
         }
     },
 
-    async searchPlayers(params = {}) {
+    // Squad updates pushed by the server; EventSource reconnects (and resumes) by itself
+    subscribeToSquadUpdates(onUpdate, onReset) {
+        if (!window.EventSource) return null;
+        const source = new EventSource('/api/squad/events');
+        source.addEventListener('squad', (event) => onUpdate(JSON.parse(event.data)));
+        source.addEventListener('reset', () => onReset());
+        return source;
+    },
+
+    async searchPlayers(params = {}, signal = undefined) {
+        try {
+            const response = await axios.get('/api/players/search', { params, signal });
+            return response.data;
+        } catch (error) {
+            if (!axios.isCancel(error)) console.error('Error searching players:', error);
+            throw error;
+        }
+    },
+
+    async suggestPlayers(query, signal = undefined) {
         try {
-            const response = await axios.get('/api/players/search', { params });
+            const params = { q: query, limit: CONFIG.MAX_SUGGESTIONS };
+            const response = await axios.get('/api/players/suggest', { params, signal });
             return response.data;
         } catch (error) {
-            console.error('Error searching players:', error);
+            if (!axios.isCancel(error)) console.error('Error getting suggestions:', error);
             throw error;
         }
     },
@@ -3,19 +3,39 @@ class BarcaRateApp {
     constructor() {
         this.players = [];
         this.currentAnalysis = null;
+        // in-flight requests, aborted when a newer keystroke or search supersedes them
+        this.suggestController = null;
+        this.searchController = null;
         this.init();
     }
 
     init() {
         this.setupEventListeners();
         this.loadSquadAnalysis();
+        this.watchSquad();
+    }
+
+    watchSquad() {
+        // Updates carry the same weaknesses and metrics as /api/squad/analysis, no refetch needed
+        this.squadEvents = API.subscribeToSquadUpdates(
+            (update) => UI.displaySquadAnalysis(update),
+            () => this.loadSquadAnalysis()
+        );
     }
 
     setupEventListeners() {
-        // Search event listeners with debouncing
-        document.getElementById('playerSearch').addEventListener('input', 
-            debounce(() => this.searchPlayers(), CONFIG.DEBOUNCE_DELAY)
+        // Keystrokes only fetch lightweight suggestions, the full search runs on commit
+        const searchInput = document.getElementById('playerSearch');
+        searchInput.addEventListener('input', 
+            debounce(() => this.suggestPlayers(), CONFIG.DEBOUNCE_DELAY)
         );
+        searchInput.addEventListener('change', () => this.searchPlayers());
+        searchInput.addEventListener('keydown', (e) => {
+            if (e.key === 'Enter') {
+                e.preventDefault();
+                this.searchPlayers();
+            }
+        });
         document.getElementById('positionFilter').addEventListener('change', () => this.searchPlayers());
         document.getElementById('maxAge').addEventListener('input', 
             debounce(() => this.searchPlayers(), 500)
@@ -44,18 +64,47 @@ class BarcaRateApp {
         }
     }
 
+    async suggestPlayers() {
+        const query = document.getElementById('playerSearch').value.trim();
+        
+        if (this.suggestController) this.suggestController.abort();
+        this.suggestController = null;
+        
+        if (query.length < CONFIG.SEARCH_MIN_LENGTH) {
+            UI.displaySuggestions([]);
+            return;
+        }
+
+        const controller = new AbortController();
+        this.suggestController = controller;
+        try {
+            const suggestions = await API.suggestPlayers(query, controller.signal);
+            UI.displaySuggestions(suggestions);
+        } catch (error) {
+            // stale keystrokes are cancelled on purpose, nothing to report
+            if (!axios.isCancel(error)) UI.displaySuggestions([]);
+        } finally {
+            if (this.suggestController === controller) this.suggestController = null;
+        }
+    }
+
     async searchPlayers() {
         const query = document.getElementById('playerSearch').value;
         const position = document.getElementById('positionFilter').value;
         const maxAge = document.getElementById('maxAge').value;
         const minRating = document.getElementById('minRating').value;
         
+        if (this.searchController) this.searchController.abort();
+        this.searchController = null;
+        
         // Show empty state if no search criteria
         if (query.length < CONFIG.SEARCH_MIN_LENGTH && !position && !maxAge && !minRating) {
             UI.showEmpty('playersList', 'Enter search criteria to find potential Culés', '🔍');
             return;
         }
 
+        const controller = new AbortController();
+        this.searchController = controller;
         try {
             UI.showLoading('playersList', 'Scouting players worldwide...');
             
@@ -65,11 +114,15 @@ class BarcaRateApp {
             if (maxAge) params.max_age = maxAge;
             if (minRating) params.min_rating = minRating;
             
-            this.players = await API.searchPlayers(params);
+            this.players = await API.searchPlayers(params, controller.signal);
             UI.displayPlayers(this.players);
         } catch (error) {
+            // superseded by a newer search, which owns the results panel now
+            if (axios.isCancel(error)) return;
             console.error('Error searching players:', error);
             UI.showError('playersList', 'Error searching players');
+        } finally {
+            if (this.searchController === controller) this.searchController = null;
         }
     }
 
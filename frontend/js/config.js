@@ -3,7 +3,8 @@ const CONFIG = {
     API_BASE_URL: window.location.origin,
     DEBOUNCE_DELAY: 300,
     SEARCH_MIN_LENGTH: 2,
-    MAX_SEARCH_RESULTS: 30
+    MAX_SEARCH_RESULTS: 30,
+    MAX_SUGGESTIONS: 8
 };
 
 // Barcelona-themed loading messages
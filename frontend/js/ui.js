@@ -257,6 +257,17 @@ const UI = {
         document.getElementById('transferAnalysis').innerHTML = html;
     },
 
+    // Typeahead options for the search box
+    displaySuggestions(suggestions) {
+        const list = document.getElementById('playerSuggestions');
+        list.innerHTML = '';
+        suggestions.forEach(suggestion => {
+            const option = document.createElement('option');
+            option.value = suggestion.name;
+            list.appendChild(option);
+        });
+    },
+
     // Loading state displays
     showLoading(containerId, message = null) {
         const container = document.getElementById(containerId);
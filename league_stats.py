@@ -0,0 +1,84 @@
+"""
+League percentiles per position.
+
+For every position (and the league as a whole) the ratings, values, ages
+and value-per-rating-point of all players are kept as sorted arrays, built
+once per data snapshot. Placing any player in that distribution is then a
+pair of bisects instead of a scan of the league.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Sequence
+
+PERCENTILE_METRICS = ("rating", "value", "age", "value_per_rating")
+
+# key used for the whole-league distribution
+ALL_POSITIONS = "ALL"
+
+# points reported for each distribution
+DISTRIBUTION_POINTS = (10, 25, 50, 75, 90)
+
+def metric_value(player: Dict, metric: str) -> float:
+    if metric == "value_per_rating":
+        # same efficiency measure the financial risk assessment uses
+        return player["value"] / max(player["rating"], 1)
+    return player[metric]
+
+class LeaguePercentiles:
+    """Sorted metric arrays per position with bisect-based percentile lookups"""
+
+    def __init__(self, players: Sequence[Dict]):
+        grouped: Dict[str, List[Dict]] = {ALL_POSITIONS: list(players)}
+        for player in players:
+            grouped.setdefault(player["position"], []).append(player)
+        self.sorted_metrics = {
+            position: {metric: sorted(metric_value(p, metric) for p in members) for metric in PERCENTILE_METRICS}
+            for position, members in grouped.items()
+        }
+
+    def positions(self) -> List[str]:
+        return sorted(self.sorted_metrics)
+
+    def percentile(self, position: str, metric: str, value: float) -> Optional[float]:
+        """Share of players at the position below value (ties count half), 0-100"""
+        values = self.sorted_metrics.get(position, {}).get(metric)
+        if not values:
+            return None
+        below = bisect_left(values, value)
+        equal = bisect_right(values, value, lo=below) - below
+        return round(100.0 * (below + 0.5 * equal) / len(values), 1)
+
+    def player_context(self, player: Dict) -> Dict:
+        """Where a player sits among La Liga players at the same position"""
+        position = player["position"] if player["position"] in self.sorted_metrics else ALL_POSITIONS
+        return {
+            "position": position,
+            "sample_size": len(self.sorted_metrics[position]["rating"]),
+            "percentiles": {
+                metric: self.percentile(position, metric, metric_value(player, metric))
+                for metric in PERCENTILE_METRICS
+            },
+        }
+
+    def distribution(self, position: str) -> Optional[Dict]:
+        """Summary points of every metric's distribution at a position"""
+        metrics = self.sorted_metrics.get(position)
+        if metrics is None:
+            return None
+        summary = {}
+        for metric, values in metrics.items():
+            points = {f"p{pct}": _value_at(values, pct) for pct in DISTRIBUTION_POINTS}
+            summary[metric] = {"min": _value_at(values, 0), **points, "max": _value_at(values, 100)}
+        return {"count": len(metrics["rating"]), "metrics": summary}
+
+def _value_at(values: List[float], pct: int):
+    """Nearest-rank value at a percentile of a sorted list"""
+    if not values:
+        return None
+    rank = max(1, -(-pct * len(values) // 100))
+    value = values[rank - 1]
+    return round(value) if isinstance(value, float) else value
+
+def snapshot_percentiles(snapshot) -> LeaguePercentiles:
+    """Percentiles for a data snapshot, built once and kept with it"""
+    return snapshot.derived("percentiles", lambda s: LeaguePercentiles(s.players))
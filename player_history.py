@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Append-only player history.
+
+The player data only knows each player's current rating and value. The
+history store keeps a dated copy of both for the whole league, one block
+per recording (a season, a transfer window, any date), so trends can be
+measured.
+
+Layout, in a directory:
+
+    players.txt   one player name per line, the line number is the player id
+    history.bin   blocks appended one after another, never rewritten
+
+Each block is a 16 byte header (magic, date as days since 1970-01-01, row
+count, padding) followed by three packed columns sorted by player id:
+uint32 ids, uint8 ratings (padded to 4 bytes) and uint32 values. That is 9
+bytes per player per recording, so 100k players over 20 seasons is about
+18MB. The file is memory-mapped and every column is a zero-copy numpy view,
+so trend queries over the whole league are a couple of vectorized passes.
+
+    python player_history.py record history/ --date 2024-07-01 --from data_2024.json
+    python player_history.py record history/                  # today, built-in players
+    python player_history.py trend history/ --metric rating --periods 3
+    BARCARATE_HISTORY=history/ python app.py
+"""
+
+import argparse
+import os
+import struct
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from players_database import current_snapshot, load_data_file, normalize_string
+
+MAGIC = b"BRH1"
+HEADER = struct.Struct("<4siII")
+EPOCH = date(1970, 1, 1).toordinal()
+
+# metrics kept per player per recording
+HISTORY_METRICS = ("rating", "value")
+
+class Block(NamedTuple):
+    """One recording: zero-copy column views into the mapped file"""
+    day: date
+    ids: np.ndarray
+    ratings: np.ndarray
+    values: np.ndarray
+
+    def column(self, metric: str) -> np.ndarray:
+        return self.ratings if metric == "rating" else self.values
+
+def _padded(n: int) -> int:
+    return (n + 3) & ~3
+
+def _block_size(count: int) -> int:
+    return HEADER.size + 4 * count + _padded(count) + 4 * count
+
+def _encode_block(day: date, ids: np.ndarray, ratings: np.ndarray, values: np.ndarray) -> bytes:
+    count = len(ids)
+    ratings_column = np.zeros(_padded(count), dtype=np.uint8)
+    ratings_column[:count] = ratings
+    return b"".join((
+        HEADER.pack(MAGIC, day.toordinal() - EPOCH, count, 0),
+        ids.astype("<u4").tobytes(),
+        ratings_column.tobytes(),
+        values.astype("<u4").tobytes(),
+    ))
+
+class HistoryStore:
+    """Dated rating/value recordings for every player, appended to a mapped file"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.names_path = os.path.join(directory, "players.txt")
+        self.data_path = os.path.join(directory, "history.bin")
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.names: List[str] = []
+        self.name_ids: Dict[str, int] = {}
+        self._names_size = 0
+        self._read_names()
+        self.blocks: Tuple[Block, ...] = ()
+        self._valid_size = 0
+        self._mapped_size = 0
+        self._map()
+
+    def _add_name(self, name: str) -> int:
+        self.names.append(name)
+        return self.name_ids.setdefault(normalize_string(name), len(self.names) - 1)
+
+    def _read_names(self):
+        """Names appended to players.txt since the last read, complete lines only"""
+        if not os.path.exists(self.names_path):
+            return
+        with open(self.names_path, "rb") as f:
+            f.seek(self._names_size)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].decode("utf-8").split("\n")[:-1]:
+            self._add_name(line)
+        self._names_size += end
+
+    def _refresh(self):
+        """Pick up recordings appended since the file was mapped, e.g. by the record command"""
+        size = os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        if size == self._mapped_size:
+            return
+        with self._lock:
+            # names are written before their block, so they are complete by now
+            self._read_names()
+            self._map()
+
+    def _map(self):
+        """(Re)map the data file and index its blocks; a torn trailing block is ignored"""
+        size = os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        self._mapped_size = size
+        if size == 0:
+            self.blocks, self._valid_size = (), 0
+            return
+        data = np.memmap(self.data_path, dtype=np.uint8, mode="r")
+        blocks, offset = [], 0
+        while offset + HEADER.size <= size:
+            magic, days, count, _ = HEADER.unpack_from(data, offset)
+            end = offset + _block_size(count)
+            if magic != MAGIC or end > size:
+                break
+            ids_at = offset + HEADER.size
+            ratings_at = ids_at + 4 * count
+            values_at = ratings_at + _padded(count)
+            blocks.append(Block(
+                date.fromordinal(days + EPOCH),
+                data[ids_at:ratings_at].view("<u4"),
+                data[ratings_at:ratings_at + count],
+                data[values_at:end].view("<u4"),
+            ))
+            offset = end
+        self.blocks, self._valid_size = tuple(blocks), offset
+
+    def dates(self) -> List[date]:
+        self._refresh()
+        return [block.day for block in self.blocks]
+
+    def record(self, day: date, players: Iterable[Dict]) -> int:
+        """Append one recording of every player's rating and value, returning the row count"""
+        self._refresh()
+        with self._lock:
+            if self.blocks and day <= self.blocks[-1].day:
+                raise ValueError(f"history already has a recording on or after {day.isoformat()}")
+
+            latest: Dict[int, Tuple[int, int]] = {}
+            new_ids: Dict[str, int] = {}
+            new_names = []
+            for player in players:
+                if not (0 <= player["rating"] <= 255 and 0 <= player["value"] <= 0xFFFFFFFF):
+                    raise ValueError(f"{player['name']}: rating must be 0-255 and value 0-4294967295 to be recorded")
+                key = normalize_string(player["name"])
+                player_id = self.name_ids.get(key, new_ids.get(key))
+                if player_id is None:
+                    player_id = new_ids[key] = len(self.names) + len(new_names)
+                    new_names.append(player["name"])
+                if player_id in latest:
+                    # history is kept per name, a second player would overwrite the first
+                    raise ValueError(f"{player['name']}: more than one player with this name (ignoring case and accents)")
+                latest[player_id] = (player["rating"], player["value"])
+            if not latest:
+                raise ValueError("no players to record")
+
+            ids = np.fromiter(sorted(latest), dtype=np.uint32, count=len(latest))
+            ratings = np.array([latest[i][0] for i in ids.tolist()], dtype=np.uint8)
+            values = np.array([latest[i][1] for i in ids.tolist()], dtype=np.uint32)
+
+            # names first, so every id in the data file always resolves
+            if new_names:
+                with open(self.names_path, "a", encoding="utf-8") as f:
+                    f.writelines(name + "\n" for name in new_names)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    self._names_size = os.fstat(f.fileno()).st_size
+                for name in new_names:
+                    self._add_name(name)
+            with open(self.data_path, "ab") as f:
+                # drop a torn block left behind by an interrupted append
+                f.truncate(self._valid_size)
+                f.write(_encode_block(day, ids, ratings, values))
+                f.flush()
+                os.fsync(f.fileno())
+            self._map()
+            return len(ids)
+
+    def block_before(self, day: Optional[date] = None, periods_back: int = 0) -> Optional[Block]:
+        """The latest recording on or before day, or the one periods_back recordings earlier"""
+        self._refresh()
+        blocks = self.blocks
+        if day is not None:
+            blocks = tuple(block for block in blocks if block.day <= day)
+        if len(blocks) <= periods_back:
+            return None
+        return blocks[-1 - periods_back]
+
+    def player_history(self, name: str) -> List[Dict]:
+        """Every recording of one player, oldest first"""
+        self._refresh()
+        player_id = self.name_ids.get(normalize_string(name.strip()))
+        if player_id is None:
+            return []
+        history = []
+        for block in self.blocks:
+            row = int(np.searchsorted(block.ids, player_id))
+            if row < len(block.ids) and block.ids[row] == player_id:
+                history.append({
+                    "date": block.day.isoformat(),
+                    "rating": int(block.ratings[row]),
+                    "value": int(block.values[row]),
+                })
+        return history
+
+    def changes(self, metric: str = "rating", periods: int = 1,
+                as_of: Optional[date] = None) -> Optional[Tuple[Block, Block, np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        (start block, end block, player ids, start values, end values) for every player
+        recorded both at the latest recording on or before as_of and `periods` recordings earlier
+        """
+        if metric not in HISTORY_METRICS:
+            raise ValueError(f"metric must be one of: {', '.join(HISTORY_METRICS)}")
+        end = self.block_before(as_of)
+        start = self.block_before(as_of, periods)
+        if start is None or end is None:
+            return None
+        ids, start_rows, end_rows = np.intersect1d(start.ids, end.ids, assume_unique=True, return_indices=True)
+        return (start, end, ids,
+                start.column(metric)[start_rows].astype(np.int64),
+                end.column(metric)[end_rows].astype(np.int64))
+
+    def top_movers(self, metric: str = "rating", periods: int = 1, limit: int = 20,
+                   descending: bool = True, as_of: Optional[date] = None) -> Optional[Dict]:
+        """Players whose metric rose (or fell) the most over the last `periods` recordings"""
+        changes = self.changes(metric, periods, as_of)
+        if changes is None:
+            return None
+        start, end, ids, before, after = changes
+        deltas = after - before
+        limit = max(0, min(limit, len(deltas)))
+        keys = -deltas if descending else deltas
+        # partial selection of the top rows, then a stable sort of just those (ties by id)
+        picked = np.argpartition(keys, limit - 1)[:limit] if 0 < limit < len(keys) else np.arange(len(keys))[:limit]
+        picked = picked[np.lexsort((ids[picked], keys[picked]))]
+        return {
+            "metric": metric,
+            "from": start.day.isoformat(),
+            "to": end.day.isoformat(),
+            "players": len(deltas),
+            "results": [
+                {"name": self.names[ids[row]], "start": int(before[row]), "end": int(after[row]), "delta": int(deltas[row])}
+                for row in picked.tolist()
+            ],
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="record and query player rating/value history")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="append a recording of the built-in data or a data file")
+    record.add_argument("directory", help="history directory (created if missing)")
+    record.add_argument("--date", type=date.fromisoformat, default=date.today(), help="recording date, YYYY-MM-DD")
+    record.add_argument("--from", dest="source", help="JSON data file (same format as BARCARATE_DATA_FILE)")
+    trend = commands.add_parser("trend", help="biggest risers or fallers between recordings")
+    trend.add_argument("directory")
+    trend.add_argument("--metric", choices=HISTORY_METRICS, default="rating")
+    trend.add_argument("--periods", type=int, default=1, help="how many recordings back to compare with")
+    trend.add_argument("--limit", type=int, default=20)
+    trend.add_argument("--fallers", action="store_true", help="list the biggest drops instead")
+    args = parser.parse_args()
+
+    store = HistoryStore(args.directory)
+    if args.command == "record":
+        players = load_data_file(args.source)[0] if args.source else current_snapshot().players
+        count = store.record(args.date, players)
+        print(f"recorded {count} players on {args.date.isoformat()} ({len(store.blocks)} recordings)")
+        return
+
+    report = store.top_movers(args.metric, max(1, args.periods), args.limit, descending=not args.fallers)
+    if report is None:
+        parser.exit(1, f"error: need more than {args.periods} recordings, have {len(store.blocks)}\n")
+    print(f"{args.metric} change {report['from']} -> {report['to']} over {report['players']} players\n")
+    for row in report["results"]:
+        print(f"{row['name'][:30]:<32}{row['start']:>12}{row['end']:>12}{row['delta']:>+12}")
+
+if __name__ == '__main__':
+    main()
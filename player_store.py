@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+SQLite-backed player store.
+
+For databases far bigger than La Liga the in-memory lists stop scaling, so
+search, typeahead, team lookups and leaderboards can be served from SQLite
+instead. Filters, sorting
+and LIMIT are pushed into SQL and answered from indexes on position, team,
+rating, age and value; name search goes through an FTS5 trigram table over
+accent-folded names, and typeahead through a table of name-word prefixes
+keyed the same way as PlayerIndexes.suggest.
+
+Build a database once, then point the server at it:
+
+    python player_store.py build scouting.db                 # built-in players
+    python player_store.py build scouting.db --from data.json
+    BARCARATE_DB=scouting.db python app.py
+
+The server only ever reads. Every thread keeps its own read-only connection,
+and the database is in WAL mode so readers in many workers never block each
+other.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List
+
+from players_database import SORTED_FIELDS, current_snapshot, load_data_file, name_prefix_keys, normalize_string
+
+SCHEMA = """
+CREATE TABLE players (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_folded TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    rating INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    position TEXT NOT NULL,
+    team TEXT NOT NULL,
+    team_folded TEXT NOT NULL,
+    team_lower TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX idx_players_name ON players (name_folded);
+CREATE INDEX idx_players_position ON players (position, rating DESC);
+CREATE INDEX idx_players_team ON players (team_folded);
+CREATE INDEX idx_players_rating ON players (rating DESC);
+CREATE INDEX idx_players_age ON players (age);
+CREATE INDEX idx_players_value ON players (value);
+CREATE TABLE name_keys (
+    key TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    PRIMARY KEY (key, id)
+) WITHOUT ROWID;
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE players_fts USING fts5(
+    name_folded, content='players', content_rowid='id', tokenize='trigram'
+);
+INSERT INTO players_fts (players_fts) VALUES ('rebuild');
+"""
+
+# trigram FTS can only answer queries of at least this many characters
+FTS_MIN_QUERY = 3
+
+def _player_row(player_id: int, player: Dict):
+    return (
+        player_id,
+        player["name"],
+        normalize_string(player["name"]),
+        player["age"],
+        player["rating"],
+        player["value"],
+        player["position"],
+        player["team"],
+        player["team"].casefold(),
+        player["team"].lower(),
+        json.dumps(player, ensure_ascii=False),
+    )
+
+def build_database(path: str, players: Iterable[Dict], batch_size: int = 5000) -> int:
+    """Create a fresh database at path from an iterable of players, returning the row count"""
+    tmp_path = path + ".building"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        count = 0
+        batch, keys = [], []
+        for player in players:
+            row = _player_row(count, player)
+            batch.append(row)
+            keys.extend((key, count) for key in set(name_prefix_keys(row[2])))
+            count += 1
+            if len(batch) >= batch_size:
+                conn.executemany("INSERT INTO players VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+                conn.executemany("INSERT INTO name_keys VALUES (?, ?)", keys)
+                batch, keys = [], []
+        if batch:
+            conn.executemany("INSERT INTO players VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            conn.executemany("INSERT INTO name_keys VALUES (?, ?)", keys)
+
+        try:
+            conn.executescript(FTS_SCHEMA)
+            has_fts = True
+        except sqlite3.OperationalError:
+            # sqlite built without fts5/trigram, name search falls back to a scan
+            has_fts = False
+        conn.execute("INSERT INTO meta VALUES ('fts', ?)", ("1" if has_fts else "0",))
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA journal_mode=WAL")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+    return count
+
+class SQLitePlayerStore:
+    """Read-only player queries against a database made by build_database"""
+
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"player database not found: {path}")
+        self.path = path
+        self._local = threading.local()
+        if self._connection().execute("SELECT 1 FROM sqlite_master WHERE name = 'name_keys'").fetchone() is None:
+            raise ValueError(f"{path} has no typeahead table, rebuild it with player_store.py build")
+        self.has_fts = self._connection().execute(
+            "SELECT value FROM meta WHERE key = 'fts'"
+        ).fetchone()[0] == "1"
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute("PRAGMA query_only = 1")
+            self._local.conn = conn
+        return conn
+
+    def _rows(self, sql: str, params: List) -> List[Dict]:
+        return [json.loads(data) for (data,) in self._connection().execute(sql, params)]
+
+    def search_players(self, query: str, position: str, team: str, min_rating: int,
+                       max_age: int, max_value: int, limit: int) -> List[Dict]:
+        """Same contract as players_database.search_players, query already accent-folded"""
+        where, params = [], []
+        if query:
+            if self.has_fts and len(query) >= FTS_MIN_QUERY:
+                where.append("id IN (SELECT rowid FROM players_fts WHERE players_fts MATCH ?)")
+                params.append('"' + query.replace('"', '""') + '"')
+            else:
+                where.append("instr(name_folded, ?) > 0")
+                params.append(query)
+        if position:
+            where.append("position = ?")
+            params.append(position)
+        if team:
+            where.append("instr(team_lower, ?) > 0")
+            params.append(team.lower())
+        if min_rating > 0:
+            where.append("rating >= ?")
+            params.append(min_rating)
+        if max_age < 50:
+            where.append("age <= ?")
+            params.append(max_age)
+        if max_value < 999999999:
+            where.append("value <= ?")
+            params.append(max_value)
+
+        sql = "SELECT data FROM players"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        # id keeps ties in load order, like the in-memory stable sort
+        sql += " ORDER BY rating DESC, id LIMIT ?"
+        params.append(limit)
+        return self._rows(sql, params)
+
+    def suggest_players(self, prefix: str, limit: int):
+        """Same contract as PlayerIndexes.suggest: any name word starting with prefix, best rated first"""
+        return self._connection().execute(
+            "SELECT id, name FROM players WHERE id IN "
+            "(SELECT id FROM name_keys WHERE key >= ? AND key < ?) "
+            "ORDER BY rating DESC, id LIMIT ?",
+            (prefix, prefix + "\uffff", limit),
+        ).fetchall()
+
+    def get_players_by_team(self, team_name: str) -> List[Dict]:
+        return self._rows("SELECT data FROM players WHERE team_folded = ? ORDER BY id", [team_name.casefold()])
+
+    def get_teams(self) -> List[str]:
+        """Sorted team names, same order as PlayerIndexes.teams"""
+        return [team for (team,) in self._connection().execute("SELECT DISTINCT team FROM players ORDER BY team")]
+
+    def leaderboard(self, field: str, limit: int, descending: bool = True) -> List[Dict]:
+        """Same contract as PlayerIndexes.leaderboard, ties in load order"""
+        if field not in SORTED_FIELDS:
+            raise ValueError(f"field must be one of: {', '.join(SORTED_FIELDS)}")
+        order = "DESC" if descending else "ASC"
+        return self._rows(f"SELECT data FROM players ORDER BY {field} {order}, id LIMIT ?", [limit])
+
+    def players_in_range(self, field: str, low=None, high=None, limit=None) -> List[Dict]:
+        """Same contract as PlayerIndexes.players_in_range"""
+        if field not in SORTED_FIELDS:
+            raise ValueError(f"field must be one of: {', '.join(SORTED_FIELDS)}")
+        where, params = [], []
+        if low is not None:
+            where.append(f"{field} >= ?")
+            params.append(low)
+        if high is not None:
+            where.append(f"{field} <= ?")
+            params.append(high)
+        sql = "SELECT data FROM players"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        # LIMIT -1 is no limit
+        sql += f" ORDER BY {field}, id LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        return self._rows(sql, params)
+
+def main():
+    parser = argparse.ArgumentParser(description="manage the SQLite player store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build a database from the built-in data or a data file")
+    build.add_argument("db", help="path of the database to create")
+    build.add_argument("--from", dest="source", help="JSON data file (same format as BARCARATE_DATA_FILE)")
+    args = parser.parse_args()
+
+    if args.source:
+        players, _ = load_data_file(args.source)
+    else:
+        players = current_snapshot().players
+    count = build_database(args.db, players)
+    print(f"wrote {count} players to {args.db}")
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,15 @@
 # La Liga player database
 
+import hashlib
+import json
+import logging
+import os
+import threading
+import unicodedata
+from bisect import bisect_left, bisect_right
+
+logger = logging.getLogger(__name__)
+
 # Barcelona
 CURRENT_SQUAD = {
     "goalkeepers": [
@@ -308,26 +318,348 @@ LA_LIGA_PLAYERS = [
     {"name": "Marcos André", "age": 27, "rating": 72, "value": 4000000, "position": "ST", "team": "Real Valladolid"}
 ]
 
+def normalize_string(text: str) -> str:
+    """
+    Normalize string by removing accents and converting to lowercase
+    """
+    if not text:
+        return ""
+    
+    # Normalize unicode characters and remove accents
+    normalized = unicodedata.normalize('NFD', text)
+    # Filter out combining characters (accents)
+    ascii_text = ''.join(c for c in normalized if unicodedata.category(c) != 'Mn')
+    return ascii_text.lower()
+
+def name_prefix_keys(folded_name: str) -> list:
+    """Typeahead keys of a folded name: the whole name and the rest of it from each later word"""
+    words = folded_name.split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+# numeric fields that get a sorted secondary index
+SORTED_FIELDS = ("value", "age", "rating")
+
+class SortedIndex:
+    """Player ids ordered by one numeric field, supporting bisect range scans"""
+
+    def __init__(self, players, field: str):
+        self.field = field
+        self.ids = sorted(range(len(players)), key=lambda i: players[i][field])
+        self.keys = [players[i][field] for i in self.ids]
+        # kept separately so ties stay in list order, same as sorted(..., reverse=True)
+        self.desc_ids = sorted(range(len(players)), key=lambda i: players[i][field], reverse=True)
+
+    def top(self, limit: int, descending: bool = True):
+        """Ids of the first `limit` players in sort order"""
+        return (self.desc_ids if descending else self.ids)[:limit]
+
+    def range(self, low=None, high=None, limit=None):
+        """Ids of the first `limit` players with low <= field <= high, ascending by field"""
+        start = 0 if low is None else bisect_left(self.keys, low)
+        end = len(self.keys) if high is None else bisect_right(self.keys, high)
+        if limit is not None:
+            end = min(end, start + limit)
+        return self.ids[start:end]
+
+class PlayerIndexes:
+    """Lookup structures derived from a player list, built once per data load"""
+
+    def __init__(self, players):
+        self.players = players
+
+        # case-folded team name -> ids (positions in the player list)
+        team_index = {}
+        for player_id, player in enumerate(players):
+            team_index.setdefault(player["team"].casefold(), []).append(player_id)
+        self.team_index = {team: tuple(ids) for team, ids in team_index.items()}
+
+        self.teams = tuple(sorted(set(player["team"] for player in players)))
+
+        # accent-folded names, aligned with the player list
+        self.folded_names = tuple(normalize_string(player["name"]) for player in players)
+        self.name_index = {}
+        for player_id, folded_name in enumerate(self.folded_names):
+            self.name_index.setdefault(folded_name, player_id)
+
+        # sorted (prefix key, id) pairs for typeahead: the full folded name and each later word
+        prefix_entries = set()
+        for player_id, folded_name in enumerate(self.folded_names):
+            for key in name_prefix_keys(folded_name):
+                prefix_entries.add((key, player_id))
+        self.prefix_index = sorted(prefix_entries)
+        self.prefix_keys = [key for key, _ in self.prefix_index]
+
+        self.sorted = {field: SortedIndex(players, field) for field in SORTED_FIELDS}
+
+    def players_by_team(self, team_name: str):
+        ids = self.team_index.get(team_name.casefold(), ())
+        return [self.players[player_id] for player_id in ids]
+
+    def search(self, query: str, position: str, team: str, min_rating: int, max_age: int, max_value: int, limit: int):
+        players = self.players
+        return [players[player_id] for player_id in
+                self.search_ids(query, position, team, min_rating, max_age, max_value, limit)]
+
+    def search_ids(self, query: str, position: str, team: str, min_rating: int, max_age: int, max_value: int, limit: int):
+        """Ids of the search matches, best rated first and ties in list order"""
+        team = team.lower()
+        players = self.players
+        matches = [
+            player_id for player_id, (player, folded_name) in enumerate(zip(players, self.folded_names))
+            if (not query or query in folded_name)
+            and (not position or player["position"] == position)
+            and (not team or team in player["team"].lower())
+            and (min_rating <= 0 or player["rating"] >= min_rating)
+            and (max_age >= 50 or player["age"] <= max_age)
+            and (max_value >= 999999999 or player["value"] <= max_value)
+        ]
+        # Sort by rating descending
+        matches.sort(key=lambda player_id: players[player_id]["rating"], reverse=True)
+        return matches[:limit]
+
+    def suggest(self, prefix: str, limit: int):
+        """(id, name) of players with a name or name-part starting with prefix, best rated first"""
+        # two bisects find the matching keys, sorting them by rating costs O(m log m) in the m matches
+        start = bisect_left(self.prefix_keys, prefix)
+        end = bisect_left(self.prefix_keys, prefix + "\uffff", start)
+        ids = set(player_id for _, player_id in self.prefix_index[start:end])
+        best = sorted(ids, key=lambda i: (-self.players[i]["rating"], i))[:limit]
+        return [(player_id, self.players[player_id]["name"]) for player_id in best]
+
+    def leaderboard(self, field: str, limit: int, descending: bool = True):
+        return [self.players[player_id] for player_id in self.sorted[field].top(limit, descending)]
+
+    def players_in_range(self, field: str, low=None, high=None, limit=None):
+        ids = self.sorted[field].range(low, high, limit)
+        return [self.players[player_id] for player_id in ids]
+
+class DataSnapshot:
+    """
+    Immutable view of the player data plus everything derived from it.
+    A snapshot is never modified after it is published, new data always
+    produces a new snapshot that replaces the old one in a single assignment.
+    """
+
+    def __init__(self, players, squad, version: int):
+        self.players = tuple(players)
+        self.squad = {group: tuple(members) for group, members in squad.items()}
+        self.version = version
+        self.players_digest = _digest(self.players)
+        self.squad_digest = _digest(self.squad)
+        self.indexes = PlayerIndexes(self.players)
+        self._derived = {}
+
+    def derived(self, key, build):
+        """Value computed from this snapshot, built on first use and kept with it"""
+        try:
+            return self._derived[key]
+        except KeyError:
+            # concurrent first uses may both build, either result is valid
+            value = self._derived[key] = build(self)
+            return value
+
+def _digest(data) -> str:
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+_snapshot = DataSnapshot(LA_LIGA_PLAYERS, CURRENT_SQUAD, 1)
+_publish_lock = threading.Lock()
+_reload_listeners = []
+
+def current_snapshot() -> DataSnapshot:
+    """The live data snapshot; hold on to it for the duration of a request"""
+    return _snapshot
+
+def publish_snapshot(players, squad) -> DataSnapshot:
+    """Build a snapshot from new data and swap it in atomically"""
+    global _snapshot
+    with _publish_lock:
+        snapshot = DataSnapshot(players, squad, _snapshot.version + 1)
+        _snapshot = snapshot
+    for listener in list(_reload_listeners):
+        try:
+            listener(snapshot)
+        except Exception:
+            logger.exception("snapshot listener failed")
+    return snapshot
+
+def add_reload_listener(listener):
+    """Call listener(snapshot) every time a new snapshot is published"""
+    _reload_listeners.append(listener)
+
+def rebuild_indexes():
+    """Republish after LA_LIGA_PLAYERS or CURRENT_SQUAD has been modified in place"""
+    publish_snapshot(LA_LIGA_PLAYERS, CURRENT_SQUAD)
+
+def get_data_version() -> int:
+    """Version counter that changes every time new data is published"""
+    return _snapshot.version
+
+# external data file: {"players": [...], "squad": {"goalkeepers": [...], ...}}
+POSITIONS = ("GK", "CB", "LB", "RB", "DM", "CM", "AM", "LW", "RW", "ST")
+SQUAD_GROUPS = ("goalkeepers", "defenders", "midfielders", "forwards")
+
+def validate_player(player, required=("name", "age", "rating", "value", "position", "team")):
+    """Raise ValueError if a player record is malformed"""
+    if not isinstance(player, dict):
+        raise ValueError(f"player must be an object, got {type(player).__name__}")
+    missing = [field for field in required if field not in player]
+    if missing:
+        raise ValueError(f"player {player.get('name', '?')!r} is missing {', '.join(missing)}")
+    for field in ("name", "team"):
+        if field in required and not (isinstance(player[field], str) and player[field]):
+            raise ValueError(f"player {player.get('name', '?')!r} has an invalid {field}")
+    for field in ("age", "rating", "value", "number"):
+        if field in player and (not isinstance(player[field], int) or isinstance(player[field], bool) or player[field] < 0):
+            raise ValueError(f"player {player['name']!r} has an invalid {field}: {player[field]!r}")
+    if player["position"] not in POSITIONS:
+        raise ValueError(f"player {player['name']!r} has an unknown position: {player['position']!r}")
+
+def load_data_file(path: str):
+    """Read and validate a data file, returning (players, squad) with the current data filling gaps"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("data file must contain a JSON object")
+
+    snapshot = current_snapshot()
+    players = data.get("players", snapshot.players)
+    squad = data.get("squad", snapshot.squad)
+
+    if not isinstance(players, (list, tuple)):
+        raise ValueError("'players' must be a list")
+    for player in players:
+        validate_player(player)
+
+    if not isinstance(squad, dict) or set(squad) != set(SQUAD_GROUPS):
+        raise ValueError(f"'squad' must have exactly these groups: {', '.join(SQUAD_GROUPS)}")
+    for members in squad.values():
+        for player in members:
+            validate_player(player, required=("name", "age", "rating", "value", "position"))
+
+    return players, squad
+
+def dump_data_file(path: str):
+    """Write the current data to a file in the format load_data_file reads"""
+    snapshot = current_snapshot()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"players": list(snapshot.players), "squad": snapshot.squad}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+class DataFileWatcher(threading.Thread):
+    """Polls a data file and publishes a new snapshot whenever it changes"""
+
+    def __init__(self, path: str, interval: float = 2.0):
+        super().__init__(name="data-file-watcher", daemon=True)
+        self.path = path
+        self.interval = interval
+        self._stamp = None
+        self._stop_event = threading.Event()
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last check, True when a new snapshot went live"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        try:
+            players, squad = load_data_file(self.path)
+        except (OSError, ValueError) as e:
+            # keep serving the previous snapshot until the file is fixed
+            logger.error("not reloading %s: %s", self.path, e)
+            return False
+        snapshot = publish_snapshot(players, squad)
+        logger.info("loaded %s as data version %d (%d players)", self.path, snapshot.version, len(snapshot.players))
+        return True
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        self._stop_event.set()
+
+def watch_data_file(path: str, interval: float = 2.0) -> DataFileWatcher:
+    """Load a data file now and keep reloading it in the background when it changes"""
+    watcher = DataFileWatcher(path, interval)
+    watcher.check()
+    watcher.start()
+    return watcher
+
+# optional external backend (see player_store.py) for search and team lookups
+_store = None
+
+def use_store(store):
+    """Serve search_players and get_players_by_team from an external store, None for in-memory"""
+    global _store
+    _store = store
+
+def search_players(query: str = "", position: str = "", team: str = "", min_rating: int = 0,
+                   max_age: int = 50, max_value: int = 999999999, limit: int = 30):
+    """Accent-insensitive name search with filters, best rated first"""
+    query = normalize_string(query.lower())
+    position = position.upper()
+    if _store is not None:
+        return _store.search_players(query, position, team, min_rating, max_age, max_value, limit)
+    return _snapshot.indexes.search(query, position, team, min_rating, max_age, max_value, limit)
+
+def suggest_players(prefix: str, limit: int = 8):
+    """Typeahead suggestions as [{"id", "name"}], matching the start of any name part"""
+    prefix = normalize_string(prefix.strip())
+    if not prefix:
+        return []
+    if _store is not None:
+        matches = _store.suggest_players(prefix, limit)
+    else:
+        matches = _snapshot.indexes.suggest(prefix, limit)
+    return [{"id": player_id, "name": name} for player_id, name in matches]
+
+def get_player_by_name(name: str):
+    """Look up a player by name, ignoring case and accents; None if unknown"""
+    player_id = _snapshot.indexes.name_index.get(normalize_string(name.strip()))
+    return None if player_id is None else _snapshot.players[player_id]
+
 def get_players_by_team(team_name: str):
     """Get all players from a specific team"""
-    return [player for player in LA_LIGA_PLAYERS if player["team"].lower() == team_name.lower()]
+    if _store is not None:
+        return _store.get_players_by_team(team_name)
+    return _snapshot.indexes.players_by_team(team_name)
 
 def get_teams():
-    """Get list of all teams"""
-    return list(set(player["team"] for player in LA_LIGA_PLAYERS))
+    """Get sorted list of all teams"""
+    return list(_snapshot.indexes.teams)
 
 def get_players_by_position(position: str):
     """Get all players by position"""
-    return [player for player in LA_LIGA_PLAYERS if player["position"] == position]
+    return [player for player in _snapshot.players if player["position"] == position]
+
+def get_leaderboard(field: str, limit: int = 10, descending: bool = True):
+    """Get the top players ordered by value, age or rating"""
+    return _snapshot.indexes.leaderboard(field, limit, descending)
+
+def get_players_in_range(field: str, low=None, high=None, limit=None):
+    """Get players whose value, age or rating lies within [low, high], ascending"""
+    return _snapshot.indexes.players_in_range(field, low, high, limit)
 
 def get_most_valuable_players(limit: int = 10):
     """Get the most valuable players in La Liga"""
-    return sorted(LA_LIGA_PLAYERS, key=lambda x: x["value"], reverse=True)[:limit]
+    return get_leaderboard("value", limit)
 
 def get_youngest_players(limit: int = 10):
     """Get the youngest players in La Liga"""
-    return sorted(LA_LIGA_PLAYERS, key=lambda x: x["age"])[:limit]
+    return get_leaderboard("age", limit, descending=False)
 
 def get_oldest_players(limit: int = 10):
     """Get the oldest players in La Liga"""
-    return sorted(LA_LIGA_PLAYERS, key=lambda x: x["age"], reverse=True)[:limit]
\ No newline at end of file
+    return get_leaderboard("age", limit)
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) != 2:
+        sys.exit("usage: python players_database.py <data-file.json>   (writes the built-in data)")
+    dump_data_file(sys.argv[1])
+    print(f"wrote {len(LA_LIGA_PLAYERS)} players and the current squad to {sys.argv[1]}")
@@ -0,0 +1,179 @@
+"""
+Materialized transfer rankings.
+
+Rating every candidate against the squad is far too expensive to repeat on
+each dashboard view. RankingService rates the whole league once per
+(player data, squad) content version on a background thread and keeps the
+result as a compact RankingSnapshot: parallel typed arrays ordered best
+first, per-position orderings and a small cache of filtered views. Requests
+only slice those arrays.
+
+While a rebuild runs, the previous ranking keeps being served. Rebuilds are
+skipped when a data reload leaves both players and squad unchanged. A build
+that fails is retried for the same data only after a backoff that doubles
+with every failure.
+"""
+
+import logging
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# filtered views kept per ranking snapshot
+MAX_CACHED_VIEWS = 256
+
+# seconds before a failed build is retried for the same data, doubled per failure up to the maximum
+REBUILD_BACKOFF = 5.0
+MAX_REBUILD_BACKOFF = 300.0
+
+class RankingSnapshot:
+    """Every candidate's rating against one squad, ordered best first"""
+
+    def __init__(self, data_snapshot, rated: Iterable[Tuple[int, float, float, str]]):
+        # rated rows are (player id, rating, raw total, recommendation)
+        rows = sorted(rated, key=lambda row: (-row[1], -row[2], row[0]))
+        self.key = (data_snapshot.players_digest, data_snapshot.squad_digest)
+        self.data_version = data_snapshot.version
+        self.players = data_snapshot.players
+
+        self.recommendations = tuple(sorted(set(row[3] for row in rows)))
+        codes = {label: code for code, label in enumerate(self.recommendations)}
+        self.ids = array("I", (row[0] for row in rows))
+        self.ratings = array("f", (row[1] for row in rows))
+        self.raw_totals = array("f", (row[2] for row in rows))
+        self.recommendation_codes = array("B", (codes[row[3]] for row in rows))
+
+        # positions in the overall ordering, per player position
+        by_position: Dict[str, array] = {}
+        for rank, player_id in enumerate(self.ids):
+            by_position.setdefault(self.players[player_id]["position"], array("I")).append(rank)
+        self.by_position = by_position
+
+        self._views = OrderedDict()
+        self._views_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def is_current(self, data_snapshot) -> bool:
+        return self.key == (data_snapshot.players_digest, data_snapshot.squad_digest)
+
+    def view(self, position: str = "", team: str = "", max_age: Optional[int] = None,
+             max_value: Optional[int] = None, min_rating: Optional[float] = None) -> Sequence[int]:
+        """Ranks (positions in the overall ordering) matching the filters, cached per filter set"""
+        if not (team or max_age is not None or max_value is not None or min_rating is not None):
+            if position:
+                return self.by_position.get(position, array("I"))
+            return range(len(self.ids))
+
+        key = (position, team.casefold(), max_age, max_value, min_rating)
+        with self._views_lock:
+            cached = self._views.get(key)
+            if cached is not None:
+                self._views.move_to_end(key)
+                return cached
+
+        candidates = self.by_position.get(position, array("I")) if position else range(len(self.ids))
+        matches = array("I")
+        for rank in candidates:
+            if min_rating is not None and self.ratings[rank] < min_rating - 1e-6:
+                # ordering is by rating, nothing further down can match
+                break
+            player = self.players[self.ids[rank]]
+            if ((not key[1] or player["team"].casefold() == key[1])
+                    and (max_age is None or player["age"] <= max_age)
+                    and (max_value is None or player["value"] <= max_value)):
+                matches.append(rank)
+
+        with self._views_lock:
+            self._views[key] = matches
+            if len(self._views) > MAX_CACHED_VIEWS:
+                self._views.popitem(last=False)
+        return matches
+
+    def entry(self, rank: int) -> Dict:
+        return {
+            "rank": rank + 1,
+            "rating": round(self.ratings[rank], 1),
+            "raw_total": round(self.raw_totals[rank], 1),
+            "recommendation": self.recommendations[self.recommendation_codes[rank]],
+            "player": self.players[self.ids[rank]],
+        }
+
+    def page(self, page: int, per_page: int, **filters) -> Tuple[int, List[Dict]]:
+        """(total matches, entries on the requested 1-based page)"""
+        ranks = self.view(**filters)
+        start = (page - 1) * per_page
+        return len(ranks), [self.entry(rank) for rank in ranks[start:start + per_page]]
+
+class RankingService:
+    """Keeps a RankingSnapshot in step with the live data, rebuilding in the background"""
+
+    def __init__(self, rate_candidates: Callable[[object], Iterable[Tuple[int, float, float, str]]]):
+        self.rate_candidates = rate_candidates
+        self._ranking: Optional[RankingSnapshot] = None
+        self._building_key = None
+        # key of the last failed build, its failure count and when it may be tried again
+        self._failed_key = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, data_snapshot) -> Optional[RankingSnapshot]:
+        """Latest ranking, possibly for older data while a rebuild runs; None before the first build"""
+        ranking = self._ranking
+        if ranking is None or not ranking.is_current(data_snapshot):
+            self.refresh(data_snapshot)
+        return ranking
+
+    def refresh(self, data_snapshot):
+        """Start a background rebuild unless the ranking is current or already being built"""
+        key = (data_snapshot.players_digest, data_snapshot.squad_digest)
+        with self._lock:
+            ranking = self._ranking
+            if (ranking is not None and ranking.key == key) or self._building_key == key:
+                return
+            if key == self._failed_key and time.monotonic() < self._retry_at:
+                return
+            self._building_key = key
+        threading.Thread(target=self._build, args=(data_snapshot, key), name="ranking-builder", daemon=True).start()
+
+    def retry_after(self, data_snapshot) -> float:
+        """Seconds until a failed build for this data is tried again, 0 if it has not failed"""
+        key = (data_snapshot.players_digest, data_snapshot.squad_digest)
+        with self._lock:
+            if key != self._failed_key:
+                return 0.0
+            return max(0.0, self._retry_at - time.monotonic())
+
+    def on_reload(self, data_snapshot):
+        """Reload listener: only keep rankings fresh once something has asked for them"""
+        if self._ranking is not None or self._building_key is not None:
+            self.refresh(data_snapshot)
+
+    def _build(self, data_snapshot, key):
+        try:
+            ranking = RankingSnapshot(data_snapshot, self.rate_candidates(data_snapshot))
+        except Exception:
+            logger.exception("building rankings for data version %d failed", data_snapshot.version)
+            ranking = None
+        with self._lock:
+            if ranking is not None:
+                # a build for newer data may have finished first, never go backwards
+                current = self._ranking
+                if current is None or current.data_version <= ranking.data_version:
+                    self._ranking = ranking
+                if self._failed_key == key:
+                    self._failed_key, self._failures = None, 0
+            else:
+                self._failures = self._failures + 1 if self._failed_key == key else 1
+                self._failed_key = key
+                self._retry_at = time.monotonic() + min(MAX_REBUILD_BACKOFF, REBUILD_BACKOFF * 2 ** (self._failures - 1))
+            if self._building_key == key:
+                self._building_key = None
+        if ranking is not None:
+            logger.info("ranked %d candidates for data version %d", len(ranking), ranking.data_version)
@@ -0,0 +1,173 @@
+"""
+Named scoring profiles.
+
+A profile holds the tunable parts of the transfer rating: the fee bands of
+the financial risk assessment, the rating tiers of the quality assessment
+and the base need score per position. The default profile is the rating
+the app has always used; other profiles ("austerity", "rebuild",
+"win-now", ...) live in a JSON file and only list what they change:
+
+    {
+      "austerity": {
+        "description": "tight budget, big fees hurt",
+        "financial_risk_thresholds": {"high_risk": 40000000, "medium_risk": 20000000, "low_risk": 8000000},
+        "position_need": {"base_scores": {"DM": 1.8}, "urgent_bonus": 0.8}
+      }
+    }
+
+Profiles are validated and compiled into ScoringProfile objects once, when
+the file is loaded. A bad profile fails loudly at startup rather than on
+some later request.
+"""
+
+import json
+import math
+from typing import Dict, Mapping, Tuple
+
+from players_database import POSITIONS
+
+DEFAULT_PROFILE = "default"
+
+DEFAULT_FINANCIAL_RISK_THRESHOLDS = {
+    "high_risk": 80000000,    # 80M+ is high financial risk
+    "medium_risk": 40000000,  # 40-80M is medium risk
+    "low_risk": 20000000,     # Under 20M is low risk
+}
+
+# (minimum rating, quality score, note), best first; the last tier catches everyone else
+DEFAULT_QUALITY_TIERS = (
+    (90, 4.2, "world-class elite talent"),
+    (87, 3.5, "exceptional top-tier performer"),
+    (84, 2.8, "high-quality proven player"),
+    (81, 2.0, "solid professional above average"),
+    (78, 1.2, "decent squad player"),
+    (75, 0.4, "borderline Barcelona quality"),
+    (0, -1.0, "below Barcelona's required standards"),
+)
+
+DEFAULT_POSITION_BASE_SCORES = {
+    "GK": 0.5,
+    "CB": 1.0,
+    "LB": 0.8,
+    "RB": 0.8,
+    "DM": 1.5,
+    "CM": 0.3,
+    "AM": 0.0,   # We have plenty
+    "LW": -0.5,  # Overcrowded
+    "RW": -0.5,  # Overcrowded
+    "ST": 1.2,
+}
+
+# added to the base need score for each urgent squad weakness at the position
+DEFAULT_URGENT_BONUS = 0.8
+
+PROFILE_KEYS = ("description", "financial_risk_thresholds", "quality_tiers", "position_need")
+
+class ScoringProfile:
+    """A validated, compiled set of scoring parameters"""
+
+    __slots__ = ("name", "description", "financial_risk_thresholds", "quality_tiers",
+                 "position_base_scores", "urgent_bonus")
+
+    def __init__(self, name: str, description: str = "",
+                 financial_risk_thresholds: Mapping[str, int] = DEFAULT_FINANCIAL_RISK_THRESHOLDS,
+                 quality_tiers: Tuple[Tuple[int, float, str], ...] = DEFAULT_QUALITY_TIERS,
+                 position_base_scores: Mapping[str, float] = DEFAULT_POSITION_BASE_SCORES,
+                 urgent_bonus: float = DEFAULT_URGENT_BONUS):
+        self.name = name
+        self.description = description
+        self.financial_risk_thresholds = dict(financial_risk_thresholds)
+        self.quality_tiers = tuple(quality_tiers)
+        self.position_base_scores = dict(position_base_scores)
+        self.urgent_bonus = urgent_bonus
+
+    def summary(self) -> Dict:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "financial_risk_thresholds": self.financial_risk_thresholds,
+            "quality_tiers": [list(tier) for tier in self.quality_tiers],
+            "position_need": {"base_scores": self.position_base_scores, "urgent_bonus": self.urgent_bonus},
+        }
+
+DEFAULT = ScoringProfile(DEFAULT_PROFILE, "the standard BarcaRate rating")
+
+def _number(value, where: str) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{where} must be a number, got {value!r}")
+    return value
+
+def compile_profile(name: str, config: Mapping) -> ScoringProfile:
+    """Validate a profile's config (overrides of the default profile) and compile it"""
+    if not isinstance(config, dict):
+        raise ValueError(f"profile {name!r} must be an object")
+    unknown = [key for key in config if key not in PROFILE_KEYS]
+    if unknown:
+        raise ValueError(f"profile {name!r} has unknown keys: {', '.join(unknown)}")
+
+    description = config.get("description", "")
+    if not isinstance(description, str):
+        raise ValueError(f"profile {name!r}: description must be a string")
+
+    thresholds = dict(DEFAULT_FINANCIAL_RISK_THRESHOLDS)
+    overrides = config.get("financial_risk_thresholds", {})
+    if not isinstance(overrides, dict) or any(key not in thresholds for key in overrides):
+        raise ValueError(f"profile {name!r}: financial_risk_thresholds takes {', '.join(thresholds)}")
+    for key, value in overrides.items():
+        if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+            raise ValueError(f"profile {name!r}: financial_risk_thresholds.{key} must be a positive integer")
+        thresholds[key] = value
+    if not thresholds["high_risk"] > thresholds["medium_risk"] > thresholds["low_risk"]:
+        raise ValueError(f"profile {name!r}: financial_risk_thresholds need high_risk > medium_risk > low_risk")
+
+    tiers = DEFAULT_QUALITY_TIERS
+    if "quality_tiers" in config:
+        raw_tiers = config["quality_tiers"]
+        if not isinstance(raw_tiers, list) or not raw_tiers:
+            raise ValueError(f"profile {name!r}: quality_tiers must be a non-empty list")
+        compiled = []
+        for i, tier in enumerate(raw_tiers):
+            where = f"profile {name!r}: quality_tiers[{i}]"
+            if not isinstance(tier, list) or len(tier) != 3:
+                raise ValueError(f"{where} must be [min_rating, score, note]")
+            min_rating, score, note = tier
+            if isinstance(min_rating, bool) or not isinstance(min_rating, int) or min_rating < 0:
+                raise ValueError(f"{where}: min_rating must be a non-negative integer")
+            if compiled and min_rating >= compiled[-1][0]:
+                raise ValueError(f"{where}: min_rating must be lower than the tier before")
+            if not isinstance(note, str) or not note:
+                raise ValueError(f"{where}: note must be a non-empty string")
+            compiled.append((min_rating, _number(score, f"{where}: score"), note))
+        if compiled[-1][0] != 0:
+            raise ValueError(f"profile {name!r}: the last quality tier must have min_rating 0")
+        tiers = tuple(compiled)
+
+    base_scores = dict(DEFAULT_POSITION_BASE_SCORES)
+    urgent_bonus = DEFAULT_URGENT_BONUS
+    position_need = config.get("position_need", {})
+    if not isinstance(position_need, dict) or any(key not in ("base_scores", "urgent_bonus") for key in position_need):
+        raise ValueError(f"profile {name!r}: position_need takes base_scores and urgent_bonus")
+    raw_scores = position_need.get("base_scores", {})
+    if not isinstance(raw_scores, dict):
+        raise ValueError(f"profile {name!r}: position_need.base_scores must be an object")
+    for position, score in raw_scores.items():
+        if position not in POSITIONS:
+            raise ValueError(f"profile {name!r}: unknown position {position!r} in position_need.base_scores")
+        base_scores[position] = _number(score, f"profile {name!r}: position_need.base_scores.{position}")
+    if "urgent_bonus" in position_need:
+        urgent_bonus = _number(position_need["urgent_bonus"], f"profile {name!r}: position_need.urgent_bonus")
+
+    return ScoringProfile(name, description, thresholds, tiers, base_scores, urgent_bonus)
+
+def load_profiles(path: str) -> Dict[str, ScoringProfile]:
+    """Compile every profile in a JSON file; the default profile is always included"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("profiles file must contain a JSON object of name -> profile")
+    if DEFAULT_PROFILE in data:
+        raise ValueError(f"{DEFAULT_PROFILE!r} is reserved for the built-in profile")
+    profiles = {DEFAULT_PROFILE: DEFAULT}
+    for name, config in data.items():
+        profiles[name] = compile_profile(name, config)
+    return profiles
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+weight sensitivity sweep
+
+TransferAnalyzer.analysis_factors carries weights and thresholds for each
+factor, but the transfer rating just sums its components. this tool uses
+them as a weighted model and shows how the ranking of every candidate moves
+as those weights and thresholds change.
+
+each player's five components (quality, age impact, financial risk,
+position need, special factors) are computed once with the real analyzer.
+every configuration in the grid is then scored in one vectorized pass:
+
+    score = w_rating * quality + w_age * age_impact + w_value * financial_risk
+          + w_position_need * position_need + w_potential * special_factors
+          - w_rating * RATING_GAP_PENALTY * max(0, rating_threshold - rating)
+          - w_value * clip(value_per_rating / efficiency_threshold - 1, 0, 2)
+
+the report covers rank stability against the baseline configuration
+(spearman correlation, top-k overlap) and the players whose rank moves most.
+
+usage:
+    python sensitivity.py --configs 1000
+    python sensitivity.py --configs 200 --players data.json --top 50 --json
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from app import TransferAnalyzer
+from players_database import current_snapshot, load_data_file
+
+# order of the component columns and their analysis_factors key
+COMPONENTS = ("quality", "age_impact", "financial_risk", "position_need", "special_factors")
+FACTOR_FOR_COMPONENT = {
+    "quality": "rating",
+    "age_impact": "age",
+    "financial_risk": "value",
+    "position_need": "position_need",
+    "special_factors": "potential",
+}
+
+# score lost per rating point below the rating threshold, scaled by the rating weight
+RATING_GAP_PENALTY = 0.25
+
+# sampled ranges: weights scale the baseline by this factor, thresholds are absolute
+WEIGHT_SCALE_RANGE = (0.5, 1.5)
+RATING_THRESHOLD_RANGE = (76, 88)
+EFFICIENCY_THRESHOLD_RANGE = (400000, 1600000)
+
+# cap on the size of one (configs x players) block, in matrix cells
+BLOCK_CELLS = 16_000_000
+
+def component_matrix(analyzer: TransferAnalyzer, players: Sequence[Dict], weaknesses: List[str]) -> np.ndarray:
+    """(players x components) matrix of unweighted analyzer component scores"""
+    # position need and age impact depend on a handful of inputs, memoize them
+    position_need_cache, age_cache = {}, {}
+    rows = np.empty((len(players), len(COMPONENTS)), dtype=np.float32)
+    for i, player in enumerate(players):
+        need_key = (player["position"], player["age"])
+        if need_key not in position_need_cache:
+            position_need_cache[need_key] = analyzer.calculate_position_need_score(
+                player["position"], player["age"], weaknesses)[0]
+        age_key = (player["age"], player["rating"])
+        if age_key not in age_cache:
+            age_cache[age_key] = analyzer.analyze_player_age_impact(player)[0]
+        rows[i] = (
+            analyzer.assess_quality(player)[0],
+            age_cache[age_key],
+            analyzer.calculate_financial_risk(player)[0],
+            position_need_cache[need_key],
+            analyzer.calculate_special_factors(player)[0],
+        )
+    return rows
+
+def baseline_config(analyzer: TransferAnalyzer) -> Dict[str, float]:
+    factors = analyzer.analysis_factors
+    config = {f"w_{FACTOR_FOR_COMPONENT[c]}": factors[FACTOR_FOR_COMPONENT[c]]["weight"] for c in COMPONENTS}
+    config["rating_threshold"] = factors["rating"]["threshold"]
+    config["efficiency_threshold"] = factors["value"]["efficiency_threshold"]
+    return config
+
+def sample_configs(baseline: Dict[str, float], count: int, seed: int) -> List[Dict[str, float]]:
+    """Baseline first, then count - 1 configurations sampled uniformly from the ranges"""
+    rng = np.random.default_rng(seed)
+    configs = [dict(baseline)]
+    for _ in range(count - 1):
+        config = {key: value * rng.uniform(*WEIGHT_SCALE_RANGE)
+                  for key, value in baseline.items() if key.startswith("w_")}
+        config["rating_threshold"] = float(rng.uniform(*RATING_THRESHOLD_RANGE))
+        config["efficiency_threshold"] = float(rng.uniform(*EFFICIENCY_THRESHOLD_RANGE))
+        configs.append(config)
+    return configs
+
+def score_block(components: np.ndarray, ratings: np.ndarray, value_per_rating: np.ndarray,
+                configs: List[Dict[str, float]]) -> np.ndarray:
+    """(configs x players) scores for a block of configurations"""
+    weights = np.array([[c[f"w_{FACTOR_FOR_COMPONENT[name]}"] for name in COMPONENTS] for c in configs],
+                       dtype=np.float32)
+    rating_thresholds = np.array([c["rating_threshold"] for c in configs], dtype=np.float32)[:, None]
+    efficiency_thresholds = np.array([c["efficiency_threshold"] for c in configs], dtype=np.float32)[:, None]
+    w_rating = weights[:, COMPONENTS.index("quality")][:, None]
+    w_value = weights[:, COMPONENTS.index("financial_risk")][:, None]
+
+    scores = weights @ components.T
+    scores -= w_rating * RATING_GAP_PENALTY * np.maximum(0.0, rating_thresholds - ratings[None, :])
+    scores -= w_value * np.clip(value_per_rating[None, :] / efficiency_thresholds - 1.0, 0.0, 2.0)
+    return scores
+
+def ranks_of(scores: np.ndarray) -> np.ndarray:
+    """Rank (0 = best) of every player in every row"""
+    # exact ties are frequent (components are tiered) and get an arbitrary but
+    # deterministic order; a stable sort would cost about 4x as much
+    order = np.argsort(-scores, axis=1)
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(scores.shape[1])[None, :], axis=1)
+    return ranks
+
+def sweep(players: Sequence[Dict], configs: List[Dict[str, float]], analyzer: TransferAnalyzer,
+          weaknesses: List[str], top_k: int = 20, movers: int = 10) -> Dict:
+    """Score every player under every configuration and summarise rank stability"""
+    n = len(players)
+    components = component_matrix(analyzer, players, weaknesses)
+    ratings = np.array([p["rating"] for p in players], dtype=np.float32)
+    value_per_rating = np.array([p["value"] / max(p["rating"], 1) for p in players], dtype=np.float32)
+
+    baseline_ranks = ranks_of(score_block(components, ratings, value_per_rating, configs[:1]))[0]
+    baseline_top = baseline_ranks < top_k
+
+    spearman = np.empty(len(configs))
+    top_overlap = np.empty(len(configs))
+    best_rank = np.full(n, n, dtype=np.int64)
+    worst_rank = np.zeros(n, dtype=np.int64)
+    rank_sum = np.zeros(n, dtype=np.float64)
+
+    block = max(1, BLOCK_CELLS // max(n, 1))
+    for start in range(0, len(configs), block):
+        ranks = ranks_of(score_block(components, ratings, value_per_rating, configs[start:start + block]))
+        d = (ranks - baseline_ranks[None, :]).astype(np.float64)
+        spearman[start:start + len(ranks)] = 1.0 - 6.0 * (d * d).sum(axis=1) / (n * (n * n - 1.0)) if n > 1 else 1.0
+        top_overlap[start:start + len(ranks)] = ((ranks < top_k) & baseline_top[None, :]).sum(axis=1) / min(top_k, n)
+        np.minimum(best_rank, ranks.min(axis=0), out=best_rank)
+        np.maximum(worst_rank, ranks.max(axis=0), out=worst_rank)
+        rank_sum += ranks.sum(axis=0)
+
+    # movers: largest rank swing among players that make the top k somewhere
+    contenders = np.flatnonzero(best_rank < top_k)
+    swing = worst_rank[contenders] - best_rank[contenders]
+    top_movers = contenders[np.argsort(-swing, kind="stable")[:movers]]
+
+    return {
+        "players": n,
+        "configs": len(configs),
+        "top_k": top_k,
+        "spearman": _summary(spearman),
+        "top_k_overlap": _summary(top_overlap),
+        "always_top_k": int(((best_rank < top_k) & (worst_rank < top_k)).sum()),
+        "ever_top_k": int(len(contenders)),
+        "top_movers": [
+            {
+                "name": players[i]["name"],
+                "team": players[i].get("team"),
+                "position": players[i]["position"],
+                "baseline_rank": int(baseline_ranks[i]) + 1,
+                "best_rank": int(best_rank[i]) + 1,
+                "worst_rank": int(worst_rank[i]) + 1,
+                "mean_rank": round(float(rank_sum[i] / len(configs)) + 1, 1),
+            }
+            for i in top_movers
+        ],
+    }
+
+def _summary(values: np.ndarray) -> Dict[str, float]:
+    return {
+        "min": round(float(values.min()), 4),
+        "p5": round(float(np.percentile(values, 5)), 4),
+        "mean": round(float(values.mean()), 4),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="sweep analysis_factors weights and thresholds over the league")
+    parser.add_argument("--configs", type=int, default=1000, help="configurations to evaluate, baseline included")
+    parser.add_argument("--players", help="JSON data file to use instead of the live player data")
+    parser.add_argument("--top", type=int, default=20, help="k for top-k stability and movers")
+    parser.add_argument("--movers", type=int, default=10, help="how many top movers to list")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="print the report as json")
+    args = parser.parse_args()
+
+    snapshot = current_snapshot()
+    players, squad = load_data_file(args.players) if args.players else (snapshot.players, snapshot.squad)
+    analyzer = TransferAnalyzer(squad)
+    candidates = [p for p in players if not analyzer.check_existing_player(p["name"])]
+    if not candidates:
+        sys.exit("error: no transfer candidates to rank")
+
+    started = time.perf_counter()
+    configs = sample_configs(baseline_config(analyzer), max(1, args.configs), args.seed)
+    report = sweep(candidates, configs, analyzer, analyzer.analyze_squad_weaknesses(), args.top, args.movers)
+    report["seconds"] = round(time.perf_counter() - started, 2)
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+
+    print(f"{report['players']} players x {report['configs']} configs in {report['seconds']}s\n")
+    print(f"spearman vs baseline      min {report['spearman']['min']:.3f}  p5 {report['spearman']['p5']:.3f}  mean {report['spearman']['mean']:.3f}")
+    print(f"top-{args.top} overlap          min {report['top_k_overlap']['min']:.0%}  p5 {report['top_k_overlap']['p5']:.0%}  mean {report['top_k_overlap']['mean']:.0%}")
+    print(f"top-{args.top} in every config  {report['always_top_k']}, in at least one: {report['ever_top_k']}\n")
+    print(f"{'top movers':<28}{'pos':<5}{'base':>6}{'best':>6}{'worst':>7}{'mean':>8}")
+    for mover in report["top_movers"]:
+        print(f"{mover['name'][:27]:<28}{mover['position']:<5}{mover['baseline_rank']:>6}"
+              f"{mover['best_rank']:>6}{mover['worst_rank']:>7}{mover['mean_rank']:>8}")
+
+if __name__ == '__main__':
+    main()
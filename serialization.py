@@ -0,0 +1,50 @@
+"""
+JSON encoding for API responses.
+
+Static payloads (the squad, the team list) are encoded once per data version
+and served from cached bytes. Everything else is encoded per request with
+orjson when it is installed, falling back to the standard library.
+"""
+
+import json
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from flask import Response
+
+from tracing import span
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+def dumps(payload: Any) -> bytes:
+    """Encode a payload to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    """Build a JSON response for a dynamic payload"""
+    with span("serialize"):
+        body = dumps(payload)
+    return Response(body, status=status, mimetype="application/json")
+
+# key -> (data version, encoded body)
+_encoded_cache: Dict[Hashable, Tuple[int, bytes]] = {}
+
+def cached_body(key: Hashable, version: int, build: Callable[[], Any]) -> bytes:
+    """Encoded body for a static payload, rebuilt only when the data version changes"""
+    entry = _encoded_cache.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    # concurrent misses may both encode, the result is identical either way
+    body = dumps(build())
+    _encoded_cache[key] = (version, body)
+    return body
+
+def cached_json_response(key: Hashable, version: int, build: Callable[[], Any]) -> Response:
+    """Build a JSON response for a static payload from cached bytes"""
+    with span("serialize", cached=True):
+        body = cached_body(key, version, build)
+    return Response(body, mimetype="application/json")
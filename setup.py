@@ -36,8 +36,9 @@ def main():
     print("\nsetup complete!")
     print("\nto run the project:")
     print("1. pip install -r requirements.txt")
-    print("2. python app.py")
-    print("3. open http://localhost:8000 in your browser")
+    print("2. python static_assets.py  (optional, hashed + compressed frontend assets)")
+    print("3. python app.py")
+    print("4. open http://localhost:8000 in your browser")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,371 @@
+"""
+League-sharded search across worker processes.
+
+The sharded store partitions the players by league (or by team) and gives
+each worker process a share of the shards with its own PlayerIndexes. A
+query is sent to every worker at once, each one scans only its own players
+and answers with the ids of its top `limit` matches, and the router merges
+those lists by rating. With a core per worker a query costs roughly a scan
+of the biggest share plus the round trips; with fewer cores than workers
+the round trips and the merge make it slower than the in-process search
+(benchmarks/equivalence.py times both), so it only pays off once a single
+process scanning every league is the bottleneck.
+
+Workers answer with global ids (positions in the full player list) and keep
+each shard in list order, so merging by (-rating, id) gives exactly the
+order of the single-process search: best rated first, ties in list order.
+
+Workers are started once, when the store is created, as fresh interpreters
+running this module (not forks of the threaded server, and not
+multiprocessing spawns, which would import the server's main module again). Every snapshot with new players
+is sent to them from a loader thread as a new generation: each worker
+indexes its share next to the one it is serving, queries switch over once
+every worker is ready, and the old generation is dropped after its last
+query.
+
+    BARCARATE_SEARCH_WORKERS=8 python app.py
+    BARCARATE_SEARCH_WORKERS=8 BARCARATE_SHARD_BY=team python app.py
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+from array import array
+from concurrent.futures import Future
+from contextlib import contextmanager
+from itertools import islice
+from multiprocessing.connection import Connection
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from players_database import PlayerIndexes
+
+logger = logging.getLogger(__name__)
+
+SHARD_KEYS = ("league", "team")
+
+# league of players without one, the built-in data is all La Liga
+DEFAULT_LEAGUE = "La Liga"
+
+# seconds a query waits for the slowest worker
+SHARD_TIMEOUT = 10.0
+
+def shard_key(player: Dict, shard_by: str) -> str:
+    if shard_by == "team":
+        return player["team"].casefold()
+    return player.get("league") or DEFAULT_LEAGUE
+
+def partition(players: Sequence[Dict], workers: int, shard_by: str = "league") -> List[array]:
+    """Player ids per worker: whole shards, biggest first onto the least loaded worker"""
+    shards: Dict[str, List[int]] = {}
+    for player_id, player in enumerate(players):
+        shards.setdefault(shard_key(player, shard_by), []).append(player_id)
+    loads = [(0, worker) for worker in range(max(1, min(workers, len(shards))))]
+    assigned: List[List[int]] = [[] for _ in loads]
+    for ids in sorted(shards.values(), key=len, reverse=True):
+        load, worker = heapq.heappop(loads)
+        assigned[worker].extend(ids)
+        heapq.heappush(loads, (load + len(ids), worker))
+    # list order within each worker keeps rating ties in global order
+    return [array("L", sorted(ids)) for ids in assigned if ids]
+
+def _serve(conn):
+    """Worker process: index the shares it is sent and answer queries against them with global ids"""
+    # generation -> (global ids, indexes of those players)
+    shares: Dict[int, Tuple[array, PlayerIndexes]] = {}
+    send_lock = threading.Lock()
+
+    def reply(request_id: int, ok: bool, result):
+        with send_lock:
+            conn.send((request_id, ok, result))
+
+    def load(request_id: int, generation: int, ids: array, players: List[Dict]):
+        try:
+            shares[generation] = (ids, PlayerIndexes(players))
+        except Exception as e:
+            reply(request_id, False, f"{type(e).__name__}: {e}")
+        else:
+            reply(request_id, True, len(ids))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        request_id, method, args = message
+        if method == "load":
+            # indexed beside the queries, which keep using the current generation meanwhile
+            threading.Thread(target=load, args=(request_id, *args), daemon=True).start()
+            continue
+        try:
+            if method == "ping":
+                result = None
+            elif method == "drop":
+                shares.pop(args[0], None)
+                result = None
+            else:
+                ids, indexes = shares[args[0]]
+                if method == "search":
+                    local_ids = indexes.search_ids(*args[1:])
+                elif method == "suggest":
+                    local_ids = [player_id for player_id, _ in indexes.suggest(*args[1:])]
+                elif method == "team":
+                    local_ids = indexes.team_index.get(args[1].casefold(), ())
+                else:
+                    raise ValueError(f"unknown method {method!r}")
+                result = [ids[player_id] for player_id in local_ids]
+            reply(request_id, True, result)
+        except Exception as e:
+            reply(request_id, False, f"{type(e).__name__}: {e}")
+
+class _Worker:
+    """One long-lived worker process plus a reader thread resolving its answers, so queries can overlap"""
+
+    def __init__(self, name: str):
+        ours, theirs = socket.socketpair()
+        self.conn = Connection(ours.detach())
+        child_fd = theirs.detach()
+        try:
+            self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--worker", str(child_fd)],
+                                            pass_fds=(child_fd,))
+        finally:
+            os.close(child_fd)
+        self._pending: Dict[int, Future] = {}
+        self._request_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._reader = threading.Thread(target=self._read, name=f"{name}-reader", daemon=True)
+        self._reader.start()
+
+    def submit(self, method: str, args: Tuple) -> Future:
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("search worker is closed")
+            request_id = next(self._request_ids)
+            self._pending[request_id] = future
+            self.conn.send((request_id, method, args))
+        return future
+
+    def _read(self):
+        while True:
+            try:
+                request_id, ok, result = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(result))
+        with self._lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(RuntimeError("search worker exited"))
+
+    def discard(self, future: Future):
+        """Stop waiting for an answer, a late one is then dropped instead of resolving anything"""
+        with self._lock:
+            for request_id, pending in list(self._pending.items()):
+                if pending is future:
+                    del self._pending[request_id]
+
+    def close(self):
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                try:
+                    self.conn.send(None)
+                except OSError:
+                    pass
+        try:
+            self.process.wait(5)
+        except subprocess.TimeoutExpired:
+            self.process.terminate()
+            self.process.wait()
+        self.conn.close()
+
+class _ShardSet:
+    """One generation of players indexed across the workers, dropped from them once retired and no longer in use"""
+
+    def __init__(self, generation: int, players: Sequence[Dict], shares: List[Tuple[_Worker, array]],
+                 version: Optional[int], digest: Optional[str]):
+        self.generation = generation
+        self.players = players
+        self.shares = shares
+        self.version = version
+        self.digest = digest
+        self._users = 0
+        self._retired = False
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Start using the generation, False if it is already dropped"""
+        with self._lock:
+            if self._closed:
+                return False
+            self._users += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            close = self._retired and self._users == 0 and not self._closed
+            self._closed = self._closed or close
+        if close:
+            self.close()
+
+    def retire(self):
+        with self._lock:
+            self._retired = True
+            close = self._users == 0 and not self._closed
+            self._closed = self._closed or close
+        if close:
+            self.close()
+
+    def close(self):
+        for worker, _ in self.shares:
+            try:
+                worker.submit("drop", (self.generation,))
+            except (RuntimeError, OSError):
+                pass  # worker already gone, nothing left to drop
+
+    def gather(self, method: str, args: Tuple) -> List[List[int]]:
+        """Send one request to every worker at once and wait for all the answers"""
+        futures = [(worker, worker.submit(method, (self.generation,) + args)) for worker, _ in self.shares]
+        try:
+            return [future.result(SHARD_TIMEOUT) for _, future in futures]
+        except Exception:
+            for worker, future in futures:
+                worker.discard(future)
+            raise
+
+    def best(self, method: str, args: Tuple, limit: int) -> List[int]:
+        """Merged top `limit` ids of per-worker lists already in (-rating, id) order"""
+        players = self.players
+        merged = heapq.merge(*self.gather(method, args), key=lambda player_id: (-players[player_id]["rating"], player_id))
+        return list(islice(merged, limit))
+
+class ShardedPlayerStore:
+    """Scatter-gather search, typeahead and team lookups with the same contract as SQLitePlayerStore"""
+
+    def __init__(self, workers: int, shard_by: str = "league"):
+        if shard_by not in SHARD_KEYS:
+            raise ValueError(f"shard_by must be one of: {', '.join(SHARD_KEYS)}")
+        self.shard_by = shard_by
+        # fresh processes, not forks: forking a process that already runs threads can copy held locks
+        self.workers = [_Worker(f"search-shard-{i}") for i in range(max(1, workers))]
+        for future in [worker.submit("ping", ()) for worker in self.workers]:
+            future.result()
+        self._generations = itertools.count(1)
+        self._shards: Optional[_ShardSet] = None
+        self._load_lock = threading.Lock()
+        # newest snapshot waiting for the loader thread, and whether that thread is running
+        self._next_snapshot = None
+        self._reloading = False
+        self._reload_lock = threading.Lock()
+
+    def load(self, players: Sequence[Dict], version: Optional[int] = None, digest: Optional[str] = None):
+        """Send a player list to the workers and switch queries to it once all are indexed"""
+        with self._load_lock:
+            current = self._shards
+            if current is not None and version is not None and current.version is not None \
+                    and version <= current.version:
+                return
+            players = tuple(players)
+            generation = next(self._generations)
+            shares = list(zip(self.workers, partition(players, len(self.workers), self.shard_by)))
+            futures = [worker.submit("load", (generation, ids, [players[player_id] for player_id in ids]))
+                       for worker, ids in shares]
+            shards = _ShardSet(generation, players, shares, version, digest)
+            try:
+                for future in futures:
+                    future.result()
+            except Exception:
+                shards.retire()
+                raise
+            self._shards = shards
+        logger.info("search sharded by %s over %d workers (%s players)", self.shard_by,
+                    len(shares), ", ".join(str(len(ids)) for _, ids in shares))
+        if current is not None:
+            current.retire()
+
+    def on_reload(self, snapshot):
+        """Reload listener: new shards only when the players changed, loaded off the publishing thread"""
+        with self._reload_lock:
+            self._next_snapshot = snapshot
+            if self._reloading:
+                return
+            self._reloading = True
+        threading.Thread(target=self._reload, name="search-shard-loader", daemon=True).start()
+
+    def _reload(self):
+        while True:
+            with self._reload_lock:
+                snapshot, self._next_snapshot = self._next_snapshot, None
+                if snapshot is None:
+                    self._reloading = False
+                    return
+            current = self._shards
+            if current is not None and current.digest == snapshot.players_digest:
+                continue
+            try:
+                self.load(snapshot.players, snapshot.version, snapshot.players_digest)
+            except Exception:
+                logger.exception("sharding players of data version %d failed", snapshot.version)
+
+    def close(self):
+        with self._load_lock:
+            shards, self._shards = self._shards, None
+        if shards is not None:
+            shards.retire()
+        for worker in self.workers:
+            worker.close()
+
+    @contextmanager
+    def _using(self) -> Iterator[_ShardSet]:
+        while True:
+            shards = self._shards
+            if shards is None:
+                raise RuntimeError("sharded store has no players loaded")
+            # a generation dropped between reading it and acquiring it has already been replaced
+            if shards.acquire():
+                break
+        try:
+            yield shards
+        finally:
+            shards.release()
+
+    def search_players(self, query: str, position: str, team: str, min_rating: int,
+                       max_age: int, max_value: int, limit: int) -> List[Dict]:
+        """Same contract as players_database.search_players, query already accent-folded"""
+        with self._using() as shards:
+            ids = shards.best("search", (query, position, team, min_rating, max_age, max_value, limit), limit)
+            return [shards.players[player_id] for player_id in ids]
+
+    def suggest_players(self, prefix: str, limit: int) -> List[Tuple[int, str]]:
+        with self._using() as shards:
+            ids = shards.best("suggest", (prefix, limit), limit)
+            return [(player_id, shards.players[player_id]["name"]) for player_id in ids]
+
+    def get_players_by_team(self, team_name: str) -> List[Dict]:
+        with self._using() as shards:
+            ids = heapq.merge(*shards.gather("team", (team_name,)))
+            return [shards.players[player_id] for player_id in ids]
+
+if __name__ == '__main__':
+    # a worker started by _Worker, talking over the socket it was handed
+    if len(sys.argv) != 3 or sys.argv[1] != "--worker":
+        sys.exit("sharded_search.py is started by the server, see BARCARATE_SEARCH_WORKERS")
+    _serve(Connection(int(sys.argv[2])))
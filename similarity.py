@@ -0,0 +1,199 @@
+"""
+Similar-player search.
+
+Every player becomes a small feature vector built from position (as a spot
+on the pitch), age, rating and log transfer value. The numeric features are
+standardised across the league, then all features are weighted. Vectors go
+into a KD-tree built once per data snapshot. A k-nearest-neighbour query
+only visits branches whose bounding box could still hold a closer player
+(and that can satisfy the age/value/rating filters), instead of measuring
+the distance to everyone.
+"""
+
+import heapq
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# rough pitch coordinates: depth from own goal (0-1) and width (0 left, 1 right)
+POSITION_COORDS = {
+    "GK": (0.0, 0.5),
+    "CB": (0.25, 0.5),
+    "LB": (0.32, 0.0),
+    "RB": (0.32, 1.0),
+    "DM": (0.5, 0.5),
+    "CM": (0.65, 0.5),
+    "AM": (0.82, 0.5),
+    "LW": (0.9, 0.0),
+    "RW": (0.9, 1.0),
+    "ST": (1.0, 0.5),
+}
+
+# how much each feature counts towards "similar"
+FEATURE_WEIGHTS = {"position": 6.0, "age": 1.0, "rating": 1.3, "value": 1.0}
+
+LEAF_SIZE = 16
+
+def _log_value(value: int) -> float:
+    # free agents would sit at -inf, treat them as a token 100k fee
+    return math.log10(max(value, 100000))
+
+class _Node:
+    __slots__ = ("lo", "hi", "left", "right", "ids", "min_age", "min_value", "max_rating")
+
+    def __init__(self, players, vectors, ids, left=None, right=None):
+        self.left = left
+        self.right = right
+        if left is None:
+            self.ids = ids
+            # bounding box of the leaf's vectors, for distance lower bounds
+            self.lo = tuple(min(column) for column in zip(*(vectors[i] for i in ids)))
+            self.hi = tuple(max(column) for column in zip(*(vectors[i] for i in ids)))
+            # bounds on the raw fields, so filtered queries can skip whole branches
+            self.min_age = min(players[i]["age"] for i in ids)
+            self.min_value = min(players[i]["value"] for i in ids)
+            self.max_rating = max(players[i]["rating"] for i in ids)
+        else:
+            self.ids = None
+            self.lo = tuple(map(min, left.lo, right.lo))
+            self.hi = tuple(map(max, left.hi, right.hi))
+            self.min_age = min(left.min_age, right.min_age)
+            self.min_value = min(left.min_value, right.min_value)
+            self.max_rating = max(left.max_rating, right.max_rating)
+
+class SimilarityIndex:
+    """KD-tree over weighted, normalised player feature vectors"""
+
+    def __init__(self, players: Sequence[Dict]):
+        self.players = players
+        ages = [p["age"] for p in players]
+        ratings = [p["rating"] for p in players]
+        values = [_log_value(p["value"]) for p in players]
+        self._scales = {
+            "age": _standardiser(ages, FEATURE_WEIGHTS["age"]),
+            "rating": _standardiser(ratings, FEATURE_WEIGHTS["rating"]),
+            "value": _standardiser(values, FEATURE_WEIGHTS["value"]),
+        }
+        self.vectors = [self.vector(p) for p in players]
+        self.dimensions = len(self.vectors[0]) if self.vectors else 0
+        self.root = self._build(list(range(len(players)))) if players else None
+        self._position_roots = {}
+
+    def vector(self, player: Dict) -> Tuple[float, ...]:
+        """Feature vector for any player record, in or outside the index"""
+        depth, width = POSITION_COORDS.get(player["position"], (0.5, 0.5))
+        weight = FEATURE_WEIGHTS["position"]
+        return (
+            depth * weight,
+            width * weight,
+            self._scales["age"](player["age"]),
+            self._scales["rating"](player["rating"]),
+            self._scales["value"](_log_value(player["value"])),
+        )
+
+    def _build(self, ids: List[int]) -> _Node:
+        vectors = self.vectors
+        if len(ids) <= LEAF_SIZE:
+            return _Node(self.players, vectors, ids)
+        # split on the axis with the widest spread
+        spreads = []
+        for axis in range(self.dimensions):
+            column = [vectors[i][axis] for i in ids]
+            spreads.append(max(column) - min(column))
+        axis = max(range(self.dimensions), key=spreads.__getitem__)
+        if spreads[axis] == 0:
+            return _Node(self.players, vectors, ids)
+        ids.sort(key=lambda i: vectors[i][axis])
+        middle = len(ids) // 2
+        return _Node(self.players, vectors, ids, left=self._build(ids[:middle]), right=self._build(ids[middle:]))
+
+    def _root_for(self, position: str) -> Optional[_Node]:
+        """Whole-league tree, or a smaller tree holding one position only (built on first use)"""
+        if not position:
+            return self.root
+        if position not in self._position_roots:
+            ids = [i for i, p in enumerate(self.players) if p["position"] == position]
+            self._position_roots[position] = self._build(ids) if ids else None
+        return self._position_roots[position]
+
+    def nearest(self, target: Tuple[float, ...], k: int, max_age: Optional[int] = None,
+                max_value: Optional[int] = None, min_rating: Optional[int] = None,
+                position: str = "", accept: Optional[Callable[[Dict], bool]] = None) -> List[Tuple[float, Dict]]:
+        """
+        The k closest players within the age/value/rating bounds, at the given
+        position if any, that also pass accept(), as (distance, player) sorted by distance
+        """
+        root = self._root_for(position)
+        if root is None or k <= 0:
+            return []
+        players, vectors = self.players, self.vectors
+        max_age = math.inf if max_age is None else max_age
+        max_value = math.inf if max_value is None else max_value
+        min_rating = -math.inf if min_rating is None else min_rating
+        t0, t1, t2, t3, t4 = target
+        best = []  # max-heap of (-squared distance, -id)
+
+        def lower_bound(node: _Node) -> float:
+            """Squared distance from the target to the node's bounding box"""
+            total = 0.0
+            for t, lo, hi in zip(target, node.lo, node.hi):
+                if t < lo:
+                    total += (lo - t) ** 2
+                elif t > hi:
+                    total += (t - hi) ** 2
+            return total
+
+        def visit(node: _Node, bound: float):
+            if node.min_age > max_age or node.min_value > max_value or node.max_rating < min_rating:
+                return
+            if len(best) == k and bound >= -best[0][0]:
+                return
+            if node.ids is not None:
+                for i in node.ids:
+                    v0, v1, v2, v3, v4 = vectors[i]
+                    dist = (v0 - t0) ** 2 + (v1 - t1) ** 2 + (v2 - t2) ** 2 + (v3 - t3) ** 2 + (v4 - t4) ** 2
+                    if len(best) == k and dist >= -best[0][0]:
+                        continue
+                    player = players[i]
+                    if (player["age"] > max_age or player["value"] > max_value or player["rating"] < min_rating
+                            or (accept is not None and not accept(player))):
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-dist, -i))
+                    else:
+                        heapq.heapreplace(best, (-dist, -i))
+                return
+            # nearer child first, the other is skipped if its box cannot beat the current worst
+            children = sorted(((lower_bound(child), n, child) for n, child in enumerate((node.left, node.right))))
+            for child_bound, _, child in children:
+                visit(child, child_bound)
+
+        visit(root, lower_bound(root))
+        ranked = sorted((-neg_dist, -neg_id) for neg_dist, neg_id in best)
+        return [(math.sqrt(dist), players[i]) for dist, i in ranked]
+
+def _standardiser(column: List[float], weight: float) -> Callable[[float], float]:
+    mean = sum(column) / len(column) if column else 0.0
+    variance = sum((x - mean) ** 2 for x in column) / len(column) if column else 0.0
+    scale = weight / (math.sqrt(variance) or 1.0)
+    return lambda x: (x - mean) * scale
+
+def find_similar_players(index: SimilarityIndex, reference: Dict, limit: int = 10,
+                         younger: bool = False, cheaper: bool = False,
+                         max_age: Optional[int] = None, max_value: Optional[int] = None,
+                         min_rating: Optional[int] = None, position: str = "",
+                         exclude_team: str = "") -> List[Tuple[float, Dict]]:
+    """Players most like the reference, optionally younger, cheaper or otherwise filtered"""
+    reference_key = (reference["name"], reference.get("team"))
+    exclude_team = exclude_team.casefold()
+    if younger:
+        max_age = min(reference["age"] - 1, max_age if max_age is not None else math.inf)
+    if cheaper:
+        max_value = min(reference["value"] - 1, max_value if max_value is not None else math.inf)
+
+    def accept(player: Dict) -> bool:
+        return not (
+            (player["name"], player.get("team")) == reference_key
+            or (exclude_team and player["team"].casefold() == exclude_team)
+        )
+
+    return index.nearest(index.vector(reference), limit, max_age, max_value, min_rating, position, accept)
@@ -0,0 +1,141 @@
+"""
+Server-sent events for squad changes.
+
+Dashboards subscribe to /api/squad/events instead of polling. Whenever a
+published data snapshot carries a different squad, the broker works out
+one compact update (players added, removed or changed, plus the new
+weaknesses and metrics), encodes it once and wakes every subscriber to send
+the same bytes. Between updates a subscriber is parked on a condition
+variable with an occasional keep-alive comment: no CPU, but it does hold a
+server worker thread for as long as it stays connected. On the threaded dev
+server or sync gunicorn workers that caps how many dashboards one process
+can follow; large fan-out needs an async worker (gunicorn -k gevent), where
+each stream is a cheap greenlet, and a higher max_subscribers.
+
+Every update has an increasing id. Browsers reconnect with Last-Event-ID
+and get the updates they missed from a short backlog, or a "reset" event
+telling them to refetch when they have been away too long.
+"""
+
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from serialization import dumps
+
+# seconds between keep-alive comments on an idle stream
+KEEPALIVE_INTERVAL = 15.0
+
+# updates kept for reconnecting clients
+BACKLOG_SIZE = 32
+
+# concurrent streams before new subscribers are turned away; every stream
+# holds a worker thread, so keep this well under the thread pool
+MAX_SUBSCRIBERS = 32
+
+# how long a browser should wait before reconnecting, in milliseconds
+RECONNECT_DELAY_MS = 3000
+
+def _players_by_name(squad: Dict[str, List[Dict]]) -> Dict[str, Tuple[str, Dict]]:
+    return {player["name"]: (group, player) for group, players in squad.items() for player in players}
+
+def squad_diff(old: Dict[str, List[Dict]], new: Dict[str, List[Dict]]) -> Dict[str, List]:
+    """Players added, removed (by name) and changed (new record) between two squads"""
+    before, after = _players_by_name(old), _players_by_name(new)
+    return {
+        "added": [dict(player, group=group) for name, (group, player) in after.items() if name not in before],
+        "removed": [name for name in before if name not in after],
+        "updated": [
+            dict(player, group=group) for name, (group, player) in after.items()
+            if name in before and before[name] != (group, player)
+        ],
+    }
+
+def _event(event_id: int, name: str, payload) -> bytes:
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (event_id, name.encode(), dumps(payload))
+
+class SquadEventBroker:
+    """Turns squad snapshot changes into one shared SSE update per change"""
+
+    def __init__(self, snapshot, summarize: Callable[[object], Dict], max_subscribers: int = MAX_SUBSCRIBERS):
+        # summarize(snapshot) -> weaknesses, metrics and the rest of the squad analysis
+        self.summarize = summarize
+        self.max_subscribers = max_subscribers
+        self._squad = snapshot.squad
+        self._squad_digest = snapshot.squad_digest
+        self._event_id = 0
+        self._backlog = deque(maxlen=BACKLOG_SIZE)
+        self._changed = threading.Condition()
+        self._publish_lock = threading.Lock()
+        self.subscribers = 0
+
+    @property
+    def last_event_id(self) -> int:
+        return self._event_id
+
+    def publish(self, snapshot):
+        """Reload listener: queue an update if the squad itself changed"""
+        with self._publish_lock:
+            if snapshot.squad_digest == self._squad_digest:
+                return
+            payload = {
+                "data_version": snapshot.version,
+                "players": squad_diff(self._squad, snapshot.squad),
+                **self.summarize(snapshot),
+            }
+            self._squad, self._squad_digest = snapshot.squad, snapshot.squad_digest
+            with self._changed:
+                self._event_id += 1
+                self._backlog.append((self._event_id, _event(self._event_id, "squad", payload)))
+                self._changed.notify_all()
+
+    def _since(self, event_id: int) -> Optional[List[bytes]]:
+        """Encoded updates after event_id, None if some are no longer kept or the id is unknown"""
+        if event_id > self._event_id:
+            # an id from before a server restart
+            return None
+        if event_id == self._event_id:
+            return []
+        if event_id + 1 < self._backlog[0][0]:
+            return None
+        return [event for eid, event in self._backlog if eid > event_id]
+
+    def full(self) -> bool:
+        """Soft cap on concurrent streams, checked before starting a new one"""
+        return self.subscribers >= self.max_subscribers
+
+    def stream(self, last_event_id: Optional[int] = None) -> Iterator[bytes]:
+        """SSE body for one subscriber, counted as subscribed while it runs"""
+        with self._changed:
+            self.subscribers += 1
+        try:
+            yield b"retry: %d\n\n" % RECONNECT_DELAY_MS
+            with self._changed:
+                current = self._event_id
+                missed = self._since(last_event_id) if last_event_id is not None else []
+            if missed is None:
+                yield _event(current, "reset", {"reason": "missed updates, refetch the squad analysis"})
+            else:
+                for event in missed:
+                    yield event
+                if last_event_id is None:
+                    # tells the browser which id to resume from
+                    yield _event(current, "ready", {})
+            seen = current
+
+            while True:
+                with self._changed:
+                    if self._event_id == seen:
+                        self._changed.wait(KEEPALIVE_INTERVAL)
+                    pending = self._since(seen)
+                    seen = self._event_id
+                if pending is None:
+                    yield _event(seen, "reset", {"reason": "missed updates, refetch the squad analysis"})
+                elif pending:
+                    for event in pending:
+                        yield event
+                else:
+                    yield b": keep-alive\n\n"
+        finally:
+            with self._changed:
+                self.subscribers -= 1
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+static asset pipeline for the frontend
+
+build step (run after changing anything in frontend/):
+    python static_assets.py
+
+copies every js/css file to frontend/dist/assets/ under a content-hashed name
+(app.3f9c2b1d0e.js), writes gzip and, when the brotli package is installed,
+brotli variants next to each file, and rewrites index.html to point at the
+hashed names. hashed files never change, so the server sends them with a
+far-future immutable Cache-Control and repeat visits skip them entirely.
+only index.html is revalidated.
+
+without a build the server falls back to serving frontend/ directly with
+revalidation headers, which is what you want while editing.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+
+from flask import Response, request, send_file, send_from_directory
+from werkzeug.exceptions import NotFound
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frontend')
+DIST_DIR = os.path.join(FRONTEND_DIR, 'dist')
+ASSETS_DIR = os.path.join(DIST_DIR, 'assets')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+# directories under frontend/ whose files get hashed
+ASSET_SOURCES = ('js', 'styles')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+# (Accept-Encoding token, file suffix), most preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# path -> (mtime, size, etag) of served files, so each one is hashed once and not per request
+_etags = {}
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:10]
+
+def file_etag(path: str) -> str:
+    """content hash of a served file, remembered until the file changes"""
+    stat = os.stat(path)
+    cached = _etags.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    with open(path, 'rb') as f:
+        etag = content_hash(f.read())
+    _etags[path] = (stat.st_mtime_ns, stat.st_size, etag)
+    return etag
+
+def write_variants(path: str, data: bytes):
+    """write a file plus its pre-compressed variants"""
+    with open(path, 'wb') as f:
+        f.write(data)
+    with open(path + '.gz', 'wb') as f:
+        # mtime=0 keeps the output identical across builds
+        with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=9, mtime=0) as gz:
+            gz.write(data)
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+
+def build():
+    """build frontend/dist, returning the manifest of source path -> hashed url"""
+    if os.path.exists(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(ASSETS_DIR)
+
+    manifest = {}
+    for source_dir in ASSET_SOURCES:
+        for name in sorted(os.listdir(os.path.join(FRONTEND_DIR, source_dir))):
+            with open(os.path.join(FRONTEND_DIR, source_dir, name), 'rb') as f:
+                data = f.read()
+            stem, ext = os.path.splitext(name)
+            hashed_name = f"{stem}.{content_hash(data)}{ext}"
+            write_variants(os.path.join(ASSETS_DIR, hashed_name), data)
+            manifest[f"{source_dir}/{name}"] = f"/assets/{hashed_name}"
+
+    with open(os.path.join(FRONTEND_DIR, 'index.html'), encoding='utf-8') as f:
+        html = f.read()
+    # only rewrite local src/href attributes, cdn urls are left alone
+    html = re.sub(
+        r'(src|href)="(%s)"' % '|'.join(re.escape(path) for path in manifest),
+        lambda m: f'{m.group(1)}="{manifest[m.group(2)]}"',
+        html,
+    )
+    write_variants(os.path.join(DIST_DIR, 'index.html'), html.encode('utf-8'))
+
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def is_built() -> bool:
+    return os.path.exists(MANIFEST_PATH)
+
+def send_precompressed(directory: str, filename: str, cache_control: str) -> Response:
+    """send a built file, picking the best pre-compressed variant the client accepts"""
+    path = os.path.realpath(os.path.join(directory, filename))
+    if not path.startswith(os.path.realpath(directory) + os.sep) or not os.path.isfile(path):
+        raise NotFound()
+
+    encoding = None
+    for token, suffix in ENCODINGS:
+        if token in request.accept_encodings and os.path.isfile(path + suffix):
+            encoding, path = token, path + suffix
+            break
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    # built files are immutable, the content hash doubles as a strong etag; a 304 never opens the file
+    response = send_file(path, mimetype=mimetype, etag=file_etag(path), conditional=True)
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+def send_source(subdirectory: str, filename: str) -> Response:
+    """send an unbuilt file from frontend/, revalidated on every use"""
+    response = send_from_directory(os.path.join(FRONTEND_DIR, subdirectory), filename)
+    response.headers['Cache-Control'] = REVALIDATE
+    return response
+
+if __name__ == '__main__':
+    manifest = build()
+    variants = 'gzip + brotli' if brotli is not None else 'gzip (pip install brotli for .br)'
+    print(f"built {len(manifest)} assets into {DIST_DIR} with {variants}")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+synthetic player generator
+
+deterministic, seeded fake leagues for benchmarks and equivalence tests,
+from a thousand players to tens of millions. the first five leagues are
+the real top five with real club names, after that come made-up lower
+divisions that get weaker the further down they are. every club has a
+28-man squad with a realistic spread of positions; ages peak in the mid
+twenties, ratings follow club strength and an age curve, and values grow
+exponentially with rating, favour youth and include the odd free agent.
+
+players are generated one at a time in a fixed order, so memory stays flat
+and a run is a prefix of any longer run with the same seed: the first 1000
+of a 10M league are the 1000-player league.
+
+    python synthetic_league.py 100000 --out league.json          # BARCARATE_DATA_FILE format
+    python synthetic_league.py 10000000 --ndjson --out league.ndjson
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+from typing import Dict, Iterator, Tuple
+
+SQUAD_SIZE = 28
+TEAMS_PER_LEAGUE = 20
+
+# (league, strength offset, clubs)
+TOP_LEAGUES = (
+    ("La Liga", 1.0, (
+        "Real Madrid CF", "FC Barcelona", "Atlético Madrid", "Athletic Bilbao", "Villarreal CF",
+        "Real Betis", "Real Sociedad", "Sevilla FC", "Valencia CF", "Girona FC", "RC Celta",
+        "CA Osasuna", "Getafe CF", "Rayo Vallecano", "RCD Mallorca", "Deportivo Alavés",
+        "RCD Espanyol", "UD Las Palmas", "CD Leganés", "Real Valladolid",
+    )),
+    ("Premier League", 1.5, (
+        "Manchester City", "Arsenal", "Liverpool", "Chelsea", "Manchester United", "Tottenham Hotspur",
+        "Newcastle United", "Aston Villa", "Brighton", "West Ham United", "Crystal Palace", "Fulham",
+        "Brentford", "Wolverhampton", "Bournemouth", "Nottingham Forest", "Everton", "Leicester City",
+        "Southampton", "Ipswich Town",
+    )),
+    ("Serie A", 0.5, (
+        "Inter", "AC Milan", "Juventus", "Napoli", "Atalanta", "AS Roma", "Lazio", "Fiorentina",
+        "Bologna", "Torino", "Udinese", "Genoa", "Monza", "Lecce", "Empoli", "Cagliari", "Hellas Verona",
+        "Parma", "Como", "Venezia",
+    )),
+    ("Bundesliga", 0.5, (
+        "Bayern München", "Bayer Leverkusen", "Borussia Dortmund", "RB Leipzig", "VfB Stuttgart",
+        "Eintracht Frankfurt", "SC Freiburg", "VfL Wolfsburg", "Borussia Mönchengladbach", "Union Berlin",
+        "Werder Bremen", "TSG Hoffenheim", "FSV Mainz", "FC Augsburg", "1. FC Heidenheim", "VfL Bochum",
+        "FC St. Pauli", "Holstein Kiel", "Hamburger SV", "1. FC Köln",
+    )),
+    ("Ligue 1", -0.5, (
+        "Paris Saint-Germain", "AS Monaco", "Olympique de Marseille", "LOSC Lille", "OGC Nice",
+        "Olympique Lyonnais", "RC Lens", "Stade Rennais", "Stade Brestois", "RC Strasbourg", "Toulouse FC",
+        "FC Nantes", "Montpellier HSC", "Stade de Reims", "AJ Auxerre", "Angers SCO", "Le Havre AC",
+        "AS Saint-Étienne", "FC Lorient", "Paris FC",
+    )),
+)
+
+# made-up lower divisions
+REGIONS = ("Iberian", "Atlantic", "Alpine", "Baltic", "Nordic", "Adriatic", "Danube", "Celtic", "Aegean", "Carpathian")
+CITIES = ("Almería", "Bergen", "Córdoba", "Dunmore", "Esbjerg", "Faro", "Győr", "Hallstatt", "Île-Verte",
+          "Jönköping", "Kraków", "Linz", "Málaga", "Nîmes", "Ourense", "Porto Novo", "Quimper", "Ribeira",
+          "São Mateus", "Tromsø", "Uppsala", "Vigo", "Wrocław", "Xàtiva", "Ypres", "Zürichsee")
+CLUB_SUFFIXES = ("FC", "United", "Athletic", "CF", "Sporting", "Rovers", "City", "SC")
+
+FIRST_NAMES = (
+    "Adrián", "Álvaro", "Andrés", "Antoine", "Bruno", "Carlos", "César", "Dani", "Diego", "Éder", "Emil",
+    "Enzo", "Fabián", "Felipe", "Florian", "Gonçalo", "Hugo", "Iker", "Iñaki", "Jérôme", "João", "Jonas",
+    "Jordi", "José", "Julián", "Kai", "Karim", "Leo", "Lúcas", "Luka", "Marc", "Marco", "Mateo", "Mikel",
+    "Milan", "Moussa", "Nico", "Noah", "Óscar", "Pablo", "Pau", "Pedro", "Rafael", "Raúl", "Rúben",
+    "Sergio", "Sébastien", "Stefan", "Thiago", "Theo", "Tomás", "Unai", "Víctor", "Vinícius", "Willem",
+    "Xavi", "Yannick", "Yusuf", "Zeki", "Ørjan",
+)
+LAST_NAMES = (
+    "Aguirre", "Álvarez", "Baptista", "Becker", "Bellamy", "Çelik", "Costa", "Dembélé", "Díaz", "Dubois",
+    "Eriksen", "Esteban", "Fernández", "Ferreira", "Fofana", "García", "Gómez", "González", "Guðmundsson",
+    "Hernández", "Horvat", "Ibáñez", "Iglesias", "Jiménez", "Jovanović", "Kane", "Kovačić", "Laporte",
+    "López", "Lozano", "Martínez", "Mendes", "Merino", "Moreno", "Müller", "Navarro", "Núñez", "Olmo",
+    "Ortega", "Pérez", "Petrović", "Quiñones", "Ramírez", "Ramos", "Rodríguez", "Romero", "Ruiz", "Sánchez",
+    "Santos", "Schäfer", "Silva", "Soler", "Suárez", "Torres", "Traoré", "Urrutia", "Vázquez", "Vidal",
+    "Weiß", "Wójcik", "Xhaka", "Yılmaz", "Zapata", "Zieliński", "Ødegaard", "Alonso", "Blanco", "Castro",
+    "Delgado", "Escudero", "Fuentes", "Gil", "Herrera", "Jurado", "Lara", "Marín", "Nieto", "Pastor",
+    "Prieto", "Reyes", "Rubio", "Serrano", "Soto", "Vega", "Ventura", "Vicente", "Zamora", "Åberg", "Öztürk",
+    "Ñíguez",
+)
+# stride through the first x last grid so consecutive players get unrelated names
+NAME_STRIDE = 1543
+
+POSITION_WEIGHTS = (
+    ("GK", 8), ("CB", 18), ("LB", 8), ("RB", 8), ("DM", 9),
+    ("CM", 14), ("AM", 8), ("LW", 8), ("RW", 8), ("ST", 11),
+)
+
+def _league(index: int) -> Tuple[str, float]:
+    if index < len(TOP_LEAGUES):
+        return TOP_LEAGUES[index][0], TOP_LEAGUES[index][1]
+    lower = index - len(TOP_LEAGUES)
+    name = f"{REGIONS[lower % len(REGIONS)]} League {lower // len(REGIONS) + 1}"
+    # lower divisions get weaker the further down they are
+    return name, max(-12.0, -4.0 - 0.25 * lower)
+
+def team_for(seed: int, team_index: int) -> Tuple[str, str, float]:
+    """(team, league, strength) of the n-th club, independent of how many are generated"""
+    league_index, slot = divmod(team_index, TEAMS_PER_LEAGUE)
+    league, league_strength = _league(league_index)
+    rng = random.Random(f"{seed}:team:{team_index}")
+    if league_index < len(TOP_LEAGUES):
+        team = TOP_LEAGUES[league_index][2][slot]
+        # the table is roughly in order of strength
+        strength = league_strength + 6.0 - 0.5 * slot + rng.gauss(0, 1.5)
+    else:
+        city = CITIES[(league_index * TEAMS_PER_LEAGUE + slot) % len(CITIES)]
+        team = f"{city} {CLUB_SUFFIXES[slot % len(CLUB_SUFFIXES)]} {league_index - len(TOP_LEAGUES) + 1}"
+        strength = league_strength + rng.gauss(0, 2.5)
+    return team, league, strength
+
+def player_name(index: int) -> str:
+    grid = len(FIRST_NAMES) * len(LAST_NAMES)
+    block, offset = divmod(index, grid)
+    j = offset * NAME_STRIDE % grid
+    name = f"{FIRST_NAMES[j % len(FIRST_NAMES)]} {LAST_NAMES[j // len(FIRST_NAMES)]}"
+    return name if block == 0 else f"{name} {block + 1}"
+
+def generate_players(count: int, seed: int = 7) -> Iterator[Dict]:
+    """Yield count synthetic players; the same seed always gives the same players"""
+    rng = random.Random(seed)
+    positions = [position for position, _ in POSITION_WEIGHTS]
+    weights = [weight for _, weight in POSITION_WEIGHTS]
+    team = None
+    for i in range(count):
+        if i % SQUAD_SIZE == 0:
+            team, league, strength = team_for(seed, i // SQUAD_SIZE)
+        position = rng.choices(positions, weights)[0]
+        age = min(38, max(16, round(rng.gauss(25.5, 4.2)) + (1 if position == "GK" else 0)))
+        # ratings peak around 27
+        curve = 3.0 - 0.12 * (age - 27) ** 2
+        rating = min(94, max(45, round(68 + strength + curve + rng.gauss(0, 4.5))))
+        if rng.random() < 0.01:
+            value = 0  # free agent
+        else:
+            youth = max(0.15, 1.6 - 0.06 * (age - 18))
+            fee = 10 ** (6 + (rating - 65) * 0.065) * youth * rng.lognormvariate(0, 0.35)
+            value = max(100000, int(round(fee / 100000)) * 100000)
+        yield {
+            "name": player_name(i),
+            "age": age,
+            "rating": rating,
+            "value": value,
+            "position": position,
+            "team": team,
+            "league": league,
+        }
+
+def write_data_file(out, players: Iterator[Dict]):
+    """Stream players as a BARCARATE_DATA_FILE style {"players": [...]} document"""
+    out.write('{"players": [\n')
+    for i, player in enumerate(players):
+        out.write((",\n" if i else "") + json.dumps(player, ensure_ascii=False))
+    out.write("\n]}\n")
+
+def write_ndjson(out, players: Iterator[Dict]):
+    for player in players:
+        out.write(json.dumps(player, ensure_ascii=False) + "\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="generate a deterministic synthetic player database")
+    parser.add_argument("count", type=int, help="number of players")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--ndjson", action="store_true", help="one player per line instead of a data file")
+    parser.add_argument("--out", help="output file (default stdout)")
+    args = parser.parse_args()
+
+    players = generate_players(args.count, args.seed)
+    write = write_ndjson if args.ndjson else write_data_file
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as out:
+            write(out, players)
+        leagues = math.ceil(math.ceil(args.count / SQUAD_SIZE) / TEAMS_PER_LEAGUE)
+        print(f"wrote {args.count} players in {leagues} leagues to {args.out}", file=sys.stderr)
+    else:
+        write(sys.stdout, players)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Per-request tracing.
+
+Every request gets a trace id (taken from an incoming X-Request-Id header
+when present) that is echoed back as X-Trace-Id. Code on the request path
+wraps interesting work in span("name"), and the timings are collected with
+the request. When the response is done the trace is handed to a background
+writer that appends it as one JSON line to a file. The hand-off never
+blocks: if the writer falls behind and its queue fills up, traces are
+dropped and counted instead.
+
+Outside a traced request span() does nothing, so it is safe to leave in
+place with tracing switched off.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from flask import g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+# traces waiting to be written before new ones are dropped
+DEFAULT_QUEUE_SIZE = 10000
+
+# longest incoming request id we accept as a trace id
+MAX_TRACE_ID_LENGTH = 64
+
+class Trace:
+    __slots__ = ("trace_id", "started", "wall_start", "spans")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.started = time.perf_counter()
+        self.wall_start = datetime.now(timezone.utc).isoformat()
+        self.spans: List[Dict] = []
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 3)
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block of work as part of the current request's trace"""
+    trace = g.get("trace") if has_request_context() else None
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record = {
+            "name": name,
+            "start_ms": round((start - trace.started) * 1000, 3),
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+        if attributes:
+            record["attributes"] = attributes
+        trace.spans.append(record)
+
+class TraceWriter(threading.Thread):
+    """Background thread appending queued trace records to a JSONL file"""
+
+    def __init__(self, path: str, max_queue: int = DEFAULT_QUEUE_SIZE):
+        super().__init__(name="trace-writer", daemon=True)
+        self.path = path
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue(maxsize=max_queue)
+
+    def submit(self, record: Dict):
+        """Queue a record for writing, dropping it if the queue is full"""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def run(self):
+        with open(self.path, "ab") as out:
+            while True:
+                record = self._queue.get()
+                # drain whatever else is waiting, then flush once
+                batch = [record]
+                while record is not None:
+                    try:
+                        record = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    batch.append(record)
+                try:
+                    out.writelines(json.dumps(r, ensure_ascii=False).encode("utf-8") + b"\n"
+                                  for r in batch if r is not None)
+                    out.flush()
+                except Exception:
+                    logger.exception("writing %d trace records failed", len(batch))
+                if batch[-1] is None:
+                    return
+
+    def stop(self, timeout: float = 2.0):
+        """Write out what is queued and stop"""
+        if self.dropped:
+            logger.warning("dropped %d traces, the writer could not keep up", self.dropped)
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self.join(timeout)
+
+class Tracer:
+    """Flask extension tracing every request into a TraceWriter"""
+
+    def __init__(self, path: str, app=None, max_queue: int = DEFAULT_QUEUE_SIZE):
+        self.writer = TraceWriter(path, max_queue)
+        self.writer.start()
+        atexit.register(self.writer.stop)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    def _start(self):
+        trace_id = request.headers.get("X-Request-Id", "")
+        if not trace_id or len(trace_id) > MAX_TRACE_ID_LENGTH:
+            trace_id = uuid.uuid4().hex
+        g.trace = Trace(trace_id)
+
+    def _finish(self, response):
+        trace = g.pop("trace", None)
+        if trace is None:
+            return response
+        response.headers["X-Trace-Id"] = trace.trace_id
+        self.writer.submit({
+            "trace_id": trace.trace_id,
+            "start": trace.wall_start,
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "duration_ms": trace.elapsed_ms(),
+            "spans": trace.spans,
+        })
+        return response
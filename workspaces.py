@@ -0,0 +1,176 @@
+"""
+Per-session squad workspaces.
+
+A workspace is a private, editable copy of the squad for trying out
+hypothetical line-ups ("what if we sell X and sign Y?") without touching
+the real squad or anyone else's workspace. Copies are copy-on-write: a new
+workspace shares the data snapshot's squad tuples and player records, an
+edit replaces only the position group it touches (a new tuple of the same
+player records plus the changed one), so a thousand workspaces cost little
+more than the edits made in them.
+
+Every edit publishes a new immutable WorkspaceState. Readers just take the
+current state, with no locks; edits to one workspace are serialized by its
+own lock. Weaknesses, position counts and the analyzer are derived per
+state and kept with it. Idle workspaces expire, and the least recently used
+are evicted when there are too many.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from players_database import SQUAD_GROUPS, validate_player
+
+# workspaces kept before the least recently used is evicted
+MAX_WORKSPACES = 1000
+
+# seconds without use before a workspace expires
+IDLE_TIMEOUT = 4 * 3600
+
+# fields every squad player needs
+SQUAD_PLAYER_FIELDS = ("name", "age", "rating", "value", "position")
+
+# fields an edit may change
+EDITABLE_FIELDS = ("age", "rating", "value", "position", "number")
+
+class WorkspaceState:
+    """One version of a workspace's squad plus everything derived from it"""
+
+    __slots__ = ("version", "squad", "_derived")
+
+    def __init__(self, squad: Dict[str, Tuple[Dict, ...]], version: int):
+        self.squad = squad
+        self.version = version
+        self._derived = {}
+
+    def derived(self, key, build):
+        """Value computed from this state, built on first use and kept with it"""
+        try:
+            return self._derived[key]
+        except KeyError:
+            value = self._derived[key] = build(self)
+            return value
+
+class SquadWorkspace:
+    """An editable squad sharing unchanged groups and players with the snapshot it came from"""
+
+    def __init__(self, workspace_id: str, snapshot, make_analyzer: Callable):
+        self.id = workspace_id
+        self.base = snapshot
+        # make_analyzer(squad, snapshot, profile) -> TransferAnalyzer for that squad
+        self.make_analyzer = make_analyzer
+        self.state = WorkspaceState(dict(snapshot.squad), 1)
+        self.last_used = time.monotonic()
+        self._lock = threading.Lock()
+
+    def analyzer(self, profile, state: Optional[WorkspaceState] = None):
+        state = state or self.state
+        return state.derived(("analyzer", profile.name), lambda s: self.make_analyzer(s.squad, self.base, profile))
+
+    def weaknesses(self, default_profile, state: Optional[WorkspaceState] = None) -> List[str]:
+        state = state or self.state
+        return state.derived("weaknesses", lambda s: self.analyzer(default_profile, s).analyze_squad_weaknesses())
+
+    def shared_groups(self, state: Optional[WorkspaceState] = None) -> List[str]:
+        """Groups still shared with the base snapshot"""
+        state = state or self.state
+        return [group for group, players in state.squad.items() if players is self.base.squad.get(group)]
+
+    def _find(self, squad, name: str) -> Optional[Tuple[str, int]]:
+        folded = name.casefold()
+        for group, players in squad.items():
+            for i, player in enumerate(players):
+                if player["name"].casefold() == folded:
+                    return group, i
+        return None
+
+    def _publish(self, squad) -> WorkspaceState:
+        self.state = WorkspaceState(squad, self.state.version + 1)
+        return self.state
+
+    def add_player(self, group: str, player: Dict) -> WorkspaceState:
+        if group not in SQUAD_GROUPS:
+            raise ValueError(f"group must be one of: {', '.join(SQUAD_GROUPS)}")
+        validate_player(player, required=SQUAD_PLAYER_FIELDS)
+        with self._lock:
+            squad = self.state.squad
+            if self._find(squad, player["name"]) is not None:
+                raise ValueError(f"{player['name']} is already in this squad")
+            squad = dict(squad)
+            squad[group] = squad.get(group, ()) + (dict(player),)
+            return self._publish(squad)
+
+    def remove_player(self, name: str) -> WorkspaceState:
+        with self._lock:
+            squad = self.state.squad
+            found = self._find(squad, name)
+            if found is None:
+                raise KeyError(name)
+            group, i = found
+            squad = dict(squad)
+            squad[group] = squad[group][:i] + squad[group][i + 1:]
+            return self._publish(squad)
+
+    def update_player(self, name: str, changes: Dict) -> WorkspaceState:
+        unknown = [field for field in changes if field not in EDITABLE_FIELDS]
+        if unknown:
+            raise ValueError(f"cannot change {', '.join(unknown)}, editable fields are: {', '.join(EDITABLE_FIELDS)}")
+        with self._lock:
+            squad = self.state.squad
+            found = self._find(squad, name)
+            if found is None:
+                raise KeyError(name)
+            group, i = found
+            updated = dict(squad[group][i], **changes)
+            validate_player(updated, required=SQUAD_PLAYER_FIELDS)
+            squad = dict(squad)
+            squad[group] = squad[group][:i] + (updated,) + squad[group][i + 1:]
+            return self._publish(squad)
+
+class WorkspaceManager:
+    """Thread-safe LRU of workspaces with idle expiry"""
+
+    def __init__(self, make_analyzer: Callable, max_workspaces: int = MAX_WORKSPACES,
+                 idle_timeout: float = IDLE_TIMEOUT):
+        self.make_analyzer = make_analyzer
+        self.max_workspaces = max_workspaces
+        self.idle_timeout = idle_timeout
+        self._workspaces: "OrderedDict[str, SquadWorkspace]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._workspaces)
+
+    def create(self, snapshot) -> SquadWorkspace:
+        workspace = SquadWorkspace(uuid.uuid4().hex, snapshot, self.make_analyzer)
+        with self._lock:
+            self._expire(workspace.last_used)
+            self._workspaces[workspace.id] = workspace
+            while len(self._workspaces) > self.max_workspaces:
+                self._workspaces.popitem(last=False)
+        return workspace
+
+    def get(self, workspace_id: str) -> Optional[SquadWorkspace]:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            workspace = self._workspaces.get(workspace_id)
+            if workspace is not None:
+                workspace.last_used = now
+                self._workspaces.move_to_end(workspace_id)
+            return workspace
+
+    def delete(self, workspace_id: str) -> bool:
+        with self._lock:
+            return self._workspaces.pop(workspace_id, None) is not None
+
+    def _expire(self, now: float):
+        # least recently used first, so stop at the first one still in use
+        while self._workspaces:
+            workspace = next(iter(self._workspaces.values()))
+            if now - workspace.last_used < self.idle_timeout:
+                break
+            self._workspaces.popitem(last=False)